@@ -3,24 +3,10 @@ Aplicação principal - Orquestração
 Apenas inicializa e chama as funções de UI
 """
 import streamlit as st
-from pathlib import Path
-import dotenv
+from configuracao_env import carregar_env
 
 # Carregar variáveis de ambiente com override para garantir recarregamento no Streamlit
-env_paths = [
-    Path.cwd() / '.env',
-    Path(__file__).parent / '.env',
-]
-
-env_loaded = False
-for env_path in env_paths:
-    if env_path.exists():
-        dotenv.load_dotenv(dotenv_path=str(env_path), override=True)
-        env_loaded = True
-        break
-
-if not env_loaded:
-    dotenv.load_dotenv(dotenv_path=".env", override=True)
+carregar_env()
 
 from processador_inpi import ProcessadorINPI
 from database_supabase import DatabaseSupabase
@@ -33,12 +19,18 @@ st.set_page_config(
     layout="wide"
 )
 
-# Inicializar processador
-processador = ProcessadorINPI()
+# Inicializar processador (uma instância por processo do servidor: guarda só configuração e
+# caches de padrões de palavras-chave, então pode ser compartilhada entre sessões e reexecuções)
+@st.cache_resource
+def init_processador() -> ProcessadorINPI:
+    """Cria o ProcessadorINPI uma única vez - cacheado para não recompilar padrões a cada reexecução"""
+    return ProcessadorINPI()
+
+processador = init_processador()
 
 # Versão do cliente: ao alterar métodos de DatabaseSupabase, incremente para invalidar
 # o cache do Streamlit (evita instância antiga sem novos métodos após hot-reload).
-_SUPABASE_CLIENT_CACHE_VERSION = 3
+_SUPABASE_CLIENT_CACHE_VERSION = 8
 
 # Inicializar conexão com Supabase
 @st.cache_resource
@@ -0,0 +1,34 @@
+"""
+Módulo para carregar as variáveis de ambiente (.env) usadas pela aplicação
+"""
+import functools
+from pathlib import Path
+from typing import Optional
+import dotenv
+
+# Tenta múltiplos caminhos para encontrar o .env
+env_paths = [
+    Path(__file__).parent / '.env',  # Mesmo diretório do arquivo
+    Path.cwd() / '.env',              # Diretório atual de trabalho
+    Path.home() / '.env',             # Home do usuário (fallback)
+]
+
+
+@functools.lru_cache(maxsize=1)
+def carregar_env() -> Optional[Path]:
+    """
+    Carrega o primeiro .env encontrado, com override para Streamlit (uma vez por processo)
+
+    Para forçar uma nova leitura use carregar_env.cache_clear() antes de chamar.
+
+    Returns:
+        Caminho do .env carregado ou None se nenhum foi encontrado
+    """
+    for env_path in env_paths:
+        if env_path.exists():
+            dotenv.load_dotenv(dotenv_path=str(env_path), override=True)
+            return env_path
+
+    # Se não encontrou, tenta carregar do diretório atual sem caminho específico
+    dotenv.load_dotenv(override=True)
+    return None
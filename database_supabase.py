@@ -1,136 +1,242 @@
 """
 Módulo para gerenciar conexão e operações com Supabase
 """
+import io
 import os
+import gzip
+import zlib
+import shutil
+import tempfile
+import threading
 from pathlib import Path
-from typing import List, Dict, Optional, Set, Tuple
-import dotenv
+from typing import BinaryIO, List, Dict, Optional, Sequence, Set, Tuple, Union
+import httpx
 import pandas as pd
+import streamlit as st
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from io import BytesIO
+from supabase import create_client
+from configuracao_env import carregar_env, env_paths
 
-# Carregar variáveis de ambiente com override para Streamlit
-# Tenta múltiplos caminhos para encontrar o .env
-env_paths = [
-    Path(__file__).parent / '.env',  # Mesmo diretório do arquivo
-    Path.cwd() / '.env',              # Diretório atual de trabalho
-    Path.home() / '.env',             # Home do usuário (fallback)
-]
-
-env_loaded = False
-for env_path in env_paths:
-    if env_path.exists():
-        dotenv.load_dotenv(dotenv_path=str(env_path), override=True)
-        env_loaded = True
-        break
-
-# Se não encontrou, tenta carregar do diretório atual sem caminho específico
-if not env_loaded:
-    dotenv.load_dotenv(override=True)
-
-# Importar Supabase com tratamento de versão
-def _detectar_versao_supabase():
-    """Detecta qual versão do Supabase está instalada"""
-    try:
-        import supabase
-        # Tentar acessar __version__ se disponível
-        if hasattr(supabase, '__version__'):
-            version_str = supabase.__version__
-            major_version = int(version_str.split('.')[0])
-            return major_version
-        else:
-            # Tentar importar métodos específicos da versão 2.x
-            try:
-                from supabase.client import Client
-                return 2
-            except ImportError:
-                # Se conseguir importar create_client, provavelmente é 1.x ou 2.x
-                from supabase import create_client
-                # Testar se tem métodos da versão 2.x
-                return 2  # Assumir 2.x por padrão (mais comum)
-    except ImportError:
-        raise ImportError(
-            "Biblioteca supabase não encontrada.\n"
-            "Instale com: pip install supabase>=2.0.0\n"
-            "Ou para versão 1.x: pip install supabase-py==1.0.3"
-        )
-
-# Importar create_client
 try:
-    from supabase import create_client
-    SUPABASE_VERSION = _detectar_versao_supabase()
-    # Client é opcional na versão 2.x
-    try:
-        from supabase.client import Client
-    except ImportError:
-        Client = type(None)  # Tipo genérico se não disponível
+    from supabase import ClientOptions
 except ImportError:
-    # Fallback para versão 1.x (supabase-py)
-    try:
-        from supabase import create_client, Client
-        SUPABASE_VERSION = 1
-    except ImportError:
-        raise ImportError(
-            "Biblioteca supabase não encontrada.\n"
-            "Instale com: pip install supabase>=2.0.0\n"
-            "Ou para versão 1.x: pip install supabase-py==1.0.3"
-        )
+    ClientOptions = None
+
+# Carregar variáveis de ambiente (.env) uma única vez por processo
+carregar_env()
+
+
+# Mensagem de erro quando SUPABASE_URL/SUPABASE_KEY não estão configuradas
+_MENSAGEM_ENV_AUSENTE = (
+    "⚠️ O arquivo .env não foi encontrado nos seguintes locais:\n"
+    "{caminhos}"
+    "\nCrie um arquivo .env na raiz do projeto com o seguinte formato:\n\n"
+)
+_MENSAGEM_ENV_VAZIO = (
+    "⚠️ As variáveis SUPABASE_URL e SUPABASE_KEY estão vazias ou não foram encontradas.\n"
+    "Verifique se o arquivo .env contém:\n\n"
+)
+_MENSAGEM_CREDENCIAIS_AUSENTES = (
+    "SUPABASE_URL e SUPABASE_KEY devem estar definidas no arquivo .env\n\n"
+    "{diagnostico}"
+    "SUPABASE_URL=https://seu-projeto.supabase.co\n"
+    "SUPABASE_KEY=sua-chave-api-aqui\n\n"
+    "Para obter essas credenciais:\n"
+    "1. Acesse https://supabase.com e faça login\n"
+    "2. Selecione seu projeto\n"
+    "3. Vá em Settings > API\n"
+    "4. Copie a URL do projeto (Project URL) para SUPABASE_URL\n"
+    "5. Copie a anon/public key para SUPABASE_KEY"
+)
+
+
+# Colunas do DataFrame processado -> colunas da tabela dados_marcas
+_MAPA_COLUNAS_DADOS_MARCAS = {
+    'marca': 'marca',
+    'classe': 'classe',
+    'especificacao': 'especificacao',
+    'titular': 'empresa',
+    'status_classe': 'status',
+    'numero_processo': 'processo',
+}
+
+# Colunas de baixa cardinalidade devolvidas como category por buscar_processos
+# (verificacao fica como texto: a interface grava novos valores nela)
+_COLUNAS_CATEGORICAS = ('classe', 'status', 'n_revista')
+
+# Sufixo dos XML de revista gravados comprimidos no storage
+SUFIXO_GZIP = '.gz'
+
+# Tamanho dos blocos lidos do arquivo enviado ao comprimir para o storage
+TAMANHO_BLOCO_UPLOAD = 1024 * 1024
+
+# Nomes usados no resto do sistema -> colunas da tabela dados_marcas (buscar_processos expõe os dois)
+_COLUNAS_COMPATIBILIDADE = {
+    'numero_processo': 'processo',
+    'titular': 'empresa',
+    'numero_revista': 'n_revista',
+    'status_classe': 'status',
+}
+
+# Lotes de inserção em dados_marcas e limite de requisições HTTP simultâneas por operação
+TAMANHO_LOTE_INSERCAO = 100
+MAX_REQUISICOES_PARALELAS = 8
+
+# Colunas de dados_marcas usadas pela consulta (evita trazer colunas que a interface não usa)
+COLUNAS_CONSULTA_DADOS_MARCAS = 'processo,classe,marca,empresa,status,n_revista,especificacao,created_at,id,verificacao'
+
+# Chave natural de dados_marcas (um registro por processo/classe/revista), usada no upsert
+COLUNAS_UNICAS_DADOS_MARCAS = 'processo,classe,n_revista'
+
+
+class _StreamRevista(io.RawIOBase):
+    """Corpo de uma resposta HTTP lido sob demanda, descomprimindo gzip à medida que os blocos chegam"""
+    
+    def __init__(self, resposta: httpx.Response, nome: str):
+        self._resposta = resposta
+        self._blocos = resposta.iter_bytes(TAMANHO_BLOCO_UPLOAD)
+        self._descompressor = None
+        self._primeiro_bloco = True
+        self._pendente = b''
+        self.name = nome
+    
+    def readable(self) -> bool:
+        return True
+    
+    def _proximo_bloco(self) -> bytes:
+        """Próximo bloco já descomprimido (b'' no fim do corpo)"""
+        for bloco in self._blocos:
+            if self._primeiro_bloco:
+                self._primeiro_bloco = False
+                # Mesmo critério do download_revista: só descomprime se houver o cabeçalho gzip
+                if bloco[:2] == b'\x1f\x8b':
+                    self._descompressor = zlib.decompressobj(wbits=31)
+            if self._descompressor is not None:
+                bloco = self._descompressor.decompress(bloco)
+            if bloco:
+                return bloco
+        if self._descompressor is not None:
+            restante = self._descompressor.flush()
+            completo = self._descompressor.eof
+            self._descompressor = None
+            # Corpo gzip cortado no meio da transferência: sem isso viraria uma revista mais curta e válida
+            if not completo:
+                raise IOError(f"Download incompleto da revista {self.name}: gzip truncado")
+            return restante
+        return b''
+    
+    def readinto(self, buffer) -> int:
+        if not self._pendente:
+            self._pendente = self._proximo_bloco()
+        quantidade = min(len(buffer), len(self._pendente))
+        buffer[:quantidade] = self._pendente[:quantidade]
+        self._pendente = self._pendente[quantidade:]
+        return quantidade
+    
+    def close(self):
+        self._resposta.close()
+        super().close()
 
 
 class DatabaseSupabase:
     """Classe para gerenciar operações com Supabase"""
     
+    # (SUPABASE_URL, SUPABASE_KEY) após a primeira leitura bem-sucedida, compartilhado entre instâncias
+    _credenciais_env: Optional[Tuple[str, str]] = None
+    _credenciais_lock = threading.Lock()
+    
     def __init__(self):
         """Inicializa conexão com Supabase"""
-        # Recarregar .env para garantir que está atualizado (importante no Streamlit)
-        for env_path in env_paths:
-            if env_path.exists():
-                dotenv.load_dotenv(dotenv_path=str(env_path), override=True)
-                break
-        else:
-            dotenv.load_dotenv(override=True)
-        
-        self.url = os.getenv("SUPABASE_URL")
-        self.key = os.getenv("SUPABASE_KEY")
+        self.url, self.key = self._obter_credenciais_env()
         
         if not self.url or not self.key:
             # Verificar se algum arquivo .env existe
             env_found = any(Path(p).exists() for p in env_paths)
             
-            mensagem = "SUPABASE_URL e SUPABASE_KEY devem estar definidas no arquivo .env\n\n"
-            if not env_found:
-                mensagem += "⚠️ O arquivo .env não foi encontrado nos seguintes locais:\n"
-                for p in env_paths:
-                    mensagem += f"   - {p}\n"
-                mensagem += "\nCrie um arquivo .env na raiz do projeto com o seguinte formato:\n\n"
+            if env_found:
+                diagnostico = _MENSAGEM_ENV_VAZIO
             else:
-                mensagem += "⚠️ As variáveis SUPABASE_URL e SUPABASE_KEY estão vazias ou não foram encontradas.\n"
-                mensagem += "Verifique se o arquivo .env contém:\n\n"
-            
-            mensagem += "SUPABASE_URL=https://seu-projeto.supabase.co\n"
-            mensagem += "SUPABASE_KEY=sua-chave-api-aqui\n\n"
-            mensagem += "Para obter essas credenciais:\n"
-            mensagem += "1. Acesse https://supabase.com e faça login\n"
-            mensagem += "2. Selecione seu projeto\n"
-            mensagem += "3. Vá em Settings > API\n"
-            mensagem += "4. Copie a URL do projeto (Project URL) para SUPABASE_URL\n"
-            mensagem += "5. Copie a anon/public key para SUPABASE_KEY"
-            
-            raise ValueError(mensagem)
+                diagnostico = _MENSAGEM_ENV_AUSENTE.format(
+                    caminhos=''.join(f"   - {p}\n" for p in env_paths)
+                )
+            raise ValueError(_MENSAGEM_CREDENCIAIS_AUSENTES.format(diagnostico=diagnostico))
         
-        # Criar cliente Supabase (compatível com versão 1.x e 2.x)
+        # Criar cliente Supabase (supabase 2.x)
         try:
-            self.supabase = create_client(self.url, self.key)
+            opcoes = self._opcoes_cliente()
+            self.supabase = create_client(self.url, self.key, options=opcoes)
+            # Mesmo httpx.Client do supabase, reaproveitado para ler revistas em streaming
+            self._cliente_http: Optional[httpx.Client] = opcoes.httpx_client if opcoes is not None else None
         except Exception as e:
             raise ValueError(
                 f"Erro ao criar cliente Supabase: {str(e)}\n\n"
                 f"Verifique se está usando a versão correta:\n"
-                f"- Versão 2.x: pip install supabase>=2.0.0\n"
-                f"- Versão 1.x: pip install supabase-py==1.0.3"
+                f"pip install supabase>=2.0.0"
             )
         
         # Configurar bucket de revistas
         self.bucket_revistas = "revista"
+        
+        # Downloads em andamento por nome de arquivo: a instância é compartilhada entre sessões
+        # (st.cache_resource), então pedidos simultâneos do mesmo arquivo esperam um único GET
+        self._downloads_em_andamento: Dict[str, Future] = {}
+        self._downloads_lock = threading.Lock()
+        
+        # Coluna de ordenação de dados_marcas (descoberta na primeira consulta por _coluna_ordem_processos)
+        self._coluna_ordem_dados_marcas: Optional[str] = None
+    
+    @staticmethod
+    def _opcoes_cliente():
+        """
+        Opções do cliente com um único httpx.Client (pool de conexões keep-alive) para PostgREST, Storage e Auth
+        
+        Evita um handshake TLS por requisição nas operações em lote. Retorna None (opções padrão)
+        se a versão instalada do supabase não aceitar httpx_client.
+        
+        Returns:
+            ClientOptions ou None
+        """
+        if ClientOptions is None or 'httpx_client' not in getattr(ClientOptions, '__dataclass_fields__', {}):
+            return None
+        
+        limites = httpx.Limits(
+            max_keepalive_connections=20,
+            max_connections=40,
+            keepalive_expiry=30
+        )
+        return ClientOptions(httpx_client=httpx.Client(
+            limits=limites,
+            timeout=httpx.Timeout(120),
+            http2=True,
+            follow_redirects=True
+        ))
+    
+    @classmethod
+    def _obter_credenciais_env(cls) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Retorna SUPABASE_URL e SUPABASE_KEY, lendo o ambiente só até a primeira leitura completa
+        
+        Returns:
+            Tupla (url, key); valores podem ser None se não estiverem configurados
+        """
+        with cls._credenciais_lock:
+            if cls._credenciais_env is not None:
+                return cls._credenciais_env
+            
+            url = os.getenv("SUPABASE_URL")
+            key = os.getenv("SUPABASE_KEY")
+            if not url or not key:
+                # O .env pode ter sido criado/editado depois da importação do módulo
+                carregar_env.cache_clear()
+                carregar_env()
+                url = os.getenv("SUPABASE_URL")
+                key = os.getenv("SUPABASE_KEY")
+            
+            if url and key:
+                cls._credenciais_env = (url, key)
+            return url, key
     
     def fazer_login(self, email: str, senha: str) -> Dict:
         """
@@ -154,7 +260,8 @@ class DatabaseSupabase:
                     'sucesso': True,
                     'usuario': {
                         'id': response.user.id,
-                        'email': response.user.email
+                        'email': response.user.email,
+                        'exp': getattr(response.session, 'expires_at', None)
                     },
                     'session': response.session
                 }
@@ -204,26 +311,34 @@ class DatabaseSupabase:
         try:
             user = self.supabase.auth.get_user()
             if user and hasattr(user, 'user') and user.user:
+                sessao = self.supabase.auth.get_session()
                 return {
                     'id': user.user.id,
-                    'email': user.user.email
+                    'email': user.user.email,
+                    'exp': getattr(sessao, 'expires_at', None)
                 }
             return None
         except Exception as e:
             return None
     
-    def verificar_sessao(self) -> bool:
+    def renovar_sessao(self) -> Optional[Dict]:
         """
-        Verifica se há uma sessão ativa
+        Renova o token da sessão atual (refresh token)
         
         Returns:
-            True se há sessão ativa, False caso contrário
+            Dicionário com dados do usuário e nova expiração ('exp') ou None se não foi possível renovar
         """
         try:
-            user = self.supabase.auth.get_user()
-            return user is not None and hasattr(user, 'user') and user.user is not None
+            response = self.supabase.auth.refresh_session()
+            if response and response.user and response.session:
+                return {
+                    'id': response.user.id,
+                    'email': response.user.email,
+                    'exp': response.session.expires_at
+                }
+            return None
         except Exception:
-            return False
+            return None
     
     def salvar_processos(self, df: pd.DataFrame, numero_revista: Optional[str] = None) -> Dict:
         """
@@ -231,7 +346,8 @@ class DatabaseSupabase:
         
         Args:
             df: DataFrame com processos concedidos
-            numero_revista: Número da revista (opcional)
+            numero_revista: Número da revista (opcional); se df tiver a coluna 'n_revista' (várias
+                revistas salvas juntas), o número de cada linha vem dela e este valor só preenche as vazias
             
         Returns:
             Dicionário com informações sobre a operação
@@ -240,71 +356,34 @@ class DatabaseSupabase:
             processos_salvos = 0
             erros = []
             
-            # Preparar dados para inserção na tabela dados_marcas
-            registros = []
-            for _, row in df.iterrows():
-                registro = {
-                    'marca': str(row.get('marca', 'N/A')) if pd.notna(row.get('marca')) else None,
-                    'classe': str(row.get('classe', 'N/A')) if pd.notna(row.get('classe')) else None,
-                    'especificacao': str(row.get('especificacao', '')) if pd.notna(row.get('especificacao')) else None,
-                    'empresa': str(row.get('titular', 'N/A')) if pd.notna(row.get('titular')) else None,
-                    'status': str(row.get('status_classe', 'Deferido')) if pd.notna(row.get('status_classe')) else 'Deferido',
-                    'processo': str(row.get('numero_processo', '')) if pd.notna(row.get('numero_processo')) else None,
-                    'n_revista': numero_revista if numero_revista else None
-                }
-                registros.append(registro)
+            # Preparar dados para inserção na tabela dados_marcas (operações por coluna, sem iterrows)
+            sub = df.reindex(columns=list(_MAPA_COLUNAS_DADOS_MARCAS)).rename(columns=_MAPA_COLUNAS_DADOS_MARCAS)
+            preenchidos = sub.notna()
+            sub = sub.astype(str).astype(object).where(preenchidos, None)
+            sub['status'] = sub['status'].fillna('Deferido')
+            if 'n_revista' in df.columns:
+                n_revista = df['n_revista']
+                sub['n_revista'] = n_revista.astype(str).astype(object).where(
+                    n_revista.notna(), numero_revista if numero_revista else None
+                )
+            else:
+                sub['n_revista'] = numero_revista if numero_revista else None
+            registros = sub.to_dict(orient='records')
             
             # Inserir dados na tabela dados_marcas
             if registros:
-                # Dividir em lotes para evitar limite de requisição
-                tamanho_lote = 100
-                
-                for i in range(0, len(registros), tamanho_lote):
-                    lote = registros[i:i + tamanho_lote]
-                    lote_num = (i // tamanho_lote) + 1
-                    
-                    try:
-                        resultado = self.supabase.table('dados_marcas').insert(lote).execute()
-                        
-                        if hasattr(resultado, 'data') and resultado.data:
-                            processos_salvos += len(resultado.data)
-                        elif hasattr(resultado, 'data') and resultado.data is None:
-                            processos_salvos += len(lote)
-                        else:
-                            processos_salvos += len(lote)
-                            
-                    except Exception as e:
-                        erro_lote = str(e)
-                        erro_msg_completo = str(e)
-                        
-                        # Verificar se é erro de RLS
-                        is_rls_error = 'row-level security' in erro_lote.lower() or '42501' in erro_msg_completo or 'rls' in erro_lote.lower()
-                        
-                        if is_rls_error:
-                            erros.append(f"RLS bloqueado no lote {lote_num}: A política de segurança do Supabase está bloqueando a inserção. IMPORTANTE: Verifique se a política permite INSERT (não apenas SELECT). As políticas RLS precisam ter uma política específica para INSERT.")
-                        
-                        for reg in lote:
-                            try:
-                                resultado_individual = self.supabase.table('dados_marcas').insert(reg).execute()
-                                
-                                if hasattr(resultado_individual, 'data') and resultado_individual.data:
-                                    processos_salvos += len(resultado_individual.data)
-                                else:
-                                    processos_salvos += 1
-                                    
-                            except Exception as e2:
-                                erro_str = str(e2).lower()
-                                erro_msg = str(e2)
-                                
-                                if 'row-level security' in erro_str or '42501' in erro_msg or 'rls' in erro_str:
-                                    erros.append(f"RLS bloqueado: Processo {reg.get('processo', 'N/A')} - A política de segurança do Supabase está bloqueando a inserção")
-                                elif 'duplicate' not in erro_str and 'unique' not in erro_str:
-                                    erros.append(f"Erro ao inserir processo {reg.get('processo', 'N/A')}: {erro_msg}")
-                                    
-                        if len(erros) == 0 and ('duplicate' in erro_lote.lower() or 'unique' in erro_lote.lower()):
-                            pass  # Duplicatas são ignoradas
-                        else:
-                            erros.append(f"Aviso no lote {lote_num}: {erro_lote}")
+                # Dividir em lotes para evitar limite de requisição; os lotes são enviados em paralelo
+                # (cada insert é uma ida e volta HTTPS, então threads sobrepõem a latência de rede)
+                lotes = [
+                    registros[i:i + TAMANHO_LOTE_INSERCAO]
+                    for i in range(0, len(registros), TAMANHO_LOTE_INSERCAO)
+                ]
+                with ThreadPoolExecutor(max_workers=min(MAX_REQUISICOES_PARALELAS, len(lotes))) as executor:
+                    resultados_lotes = executor.map(self._inserir_lote, lotes, range(1, len(lotes) + 1))
+                    for salvos_lote, erros_lote in resultados_lotes:
+                        processos_salvos += salvos_lote
+                        erros.extend(erros_lote)
+                _limpar_cache_dados_marcas()
             
             return {
                 'sucesso': True,
@@ -319,13 +398,92 @@ class DatabaseSupabase:
                 'erro': str(e),
                 'processos_salvos': 0
             }
-    
+
+    def _inserir_lote(self, lote: List[Dict], lote_num: int) -> Tuple[int, List[str]]:
+        """
+        Insere um lote de registros em dados_marcas (executado em thread pelo salvar_processos)
+
+        Usa upsert ignorando duplicatas (o servidor descarta as linhas já existentes em um único
+        comando). Requer a constraint UNIQUE (processo, classe, n_revista) descrita no INSTRUCOES.md;
+        sem ela, faz um insert simples.
+
+        Args:
+            lote: Registros a inserir
+            lote_num: Número do lote (1-based), usado nas mensagens
+
+        Returns:
+            Tupla (quantidade salva, lista de erros/avisos do lote)
+        """
+        tabela = self.supabase.table('dados_marcas')
+
+        try:
+            try:
+                resultado = tabela.upsert(lote, on_conflict=COLUNAS_UNICAS_DADOS_MARCAS, ignore_duplicates=True).execute()
+            except Exception as e:
+                # 42P10: não existe constraint UNIQUE correspondente ao on_conflict
+                if '42P10' not in str(e) and 'on conflict' not in str(e).lower():
+                    raise
+                try:
+                    resultado = tabela.insert(lote).execute()
+                except Exception as e_insert:
+                    # Sem upsert, uma única duplicata derruba o lote inteiro: tenta linha a linha
+                    erro_insert = str(e_insert).lower()
+                    if 'duplicate' not in erro_insert and 'unique' not in erro_insert:
+                        raise
+                    return self._inserir_registros_individualmente(tabela, lote)
+
+            if hasattr(resultado, 'data') and resultado.data is not None:
+                return len(resultado.data), []
+            return len(lote), []
+
+        except Exception as e:
+            erro_lote = str(e)
+
+            # Verificar se é erro de RLS
+            if 'row-level security' in erro_lote.lower() or '42501' in erro_lote or 'rls' in erro_lote.lower():
+                return 0, [f"RLS bloqueado no lote {lote_num}: A política de segurança do Supabase está bloqueando a inserção. IMPORTANTE: Verifique se a política permite INSERT (não apenas SELECT). As políticas RLS precisam ter uma política específica para INSERT."]
+
+            if 'duplicate' in erro_lote.lower() or 'unique' in erro_lote.lower():
+                return 0, []  # Duplicatas são ignoradas
+
+            return 0, [f"Aviso no lote {lote_num}: {erro_lote}"]
+
+    @staticmethod
+    def _inserir_registros_individualmente(tabela, lote: List[Dict]) -> Tuple[int, List[str]]:
+        """
+        Insere os registros de um lote um a um, ignorando as duplicatas (sem a constraint UNIQUE)
+
+        Args:
+            tabela: Tabela dados_marcas do cliente Supabase
+            lote: Registros a inserir
+
+        Returns:
+            Tupla (quantidade salva, lista de erros dos registros que falharam)
+        """
+        processos_salvos = 0
+        erros = []
+        for reg in lote:
+            try:
+                resultado = tabela.insert(reg).execute()
+                if hasattr(resultado, 'data') and resultado.data:
+                    processos_salvos += len(resultado.data)
+                else:
+                    processos_salvos += 1
+            except Exception as e:
+                erro_str = str(e).lower()
+                if 'row-level security' in erro_str or '42501' in str(e) or 'rls' in erro_str:
+                    erros.append(f"RLS bloqueado: Processo {reg.get('processo', 'N/A')} - A política de segurança do Supabase está bloqueando a inserção")
+                elif 'duplicate' not in erro_str and 'unique' not in erro_str:
+                    erros.append(f"Erro ao inserir processo {reg.get('processo', 'N/A')}: {str(e)}")
+        return processos_salvos, erros
+
     def buscar_processos(
         self,
         classes: Optional[List[str]] = None,
         marca: Optional[str] = None,
         numero_revista: Optional[str] = None,
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        colunas: Optional[Sequence[str]] = None
     ) -> pd.DataFrame:
         """
         Busca processos da tabela dados_marcas do Supabase
@@ -335,81 +493,52 @@ class DatabaseSupabase:
             marca: Filtrar por marca (opcional)
             numero_revista: Filtrar por número da revista (opcional)
             limit: Limite de registros (None para buscar todos)
+            colunas: Colunas de dados_marcas a trazer (None para COLUNAS_CONSULTA_DADOS_MARCAS);
+                id e a coluna de ordenação são sempre incluídas (chave da paginação)
             
         Returns:
             DataFrame com processos encontrados
         """
         try:
-            todos_registros = []
-            pagina = 0
-            tamanho_pagina = 1000
-            limite_maximo = limit
-            
-            colunas_timestamp = ['updated_at', 'created_at', 'id']
-            coluna_timestamp_funcional = None
-            
-            for col_timestamp in colunas_timestamp:
-                try:
-                    query_teste = self.supabase.table('dados_marcas').select('id').order(col_timestamp, desc=True).limit(1)
-                    query_teste.execute()
-                    coluna_timestamp_funcional = col_timestamp
-                    break
-                except:
-                    continue
-            
-            if not coluna_timestamp_funcional:
-                coluna_timestamp_funcional = 'id'
-            
-            while True:
-                query = self.supabase.table('dados_marcas').select('*')
-                
-                if classes and len(classes) > 0:
-                    query = query.in_('classe', classes)
-                
-                if marca:
-                    query = query.ilike('marca', f'%{marca}%')
-                
-                if numero_revista:
-                    query = query.eq('n_revista', numero_revista)
-                
-                # Aplicar paginação com a coluna que funciona
-                query = query.order(coluna_timestamp_funcional, desc=True).range(
-                    pagina * tamanho_pagina,
-                    (pagina + 1) * tamanho_pagina - 1
-                )
-                
-                resultado = query.execute()
-                
-                if resultado.data and len(resultado.data) > 0:
-                    todos_registros.extend(resultado.data)
-                    
-                    # Se retornou menos que o tamanho da página, chegou ao fim
-                    if len(resultado.data) < tamanho_pagina:
-                        break
-                    
-                    # Se já atingimos o limite máximo (apenas se limite foi definido)
-                    if limite_maximo is not None and len(todos_registros) >= limite_maximo:
-                        todos_registros = todos_registros[:limite_maximo]
-                        break
-                    
-                    pagina += 1
-                else:
-                    break
+            todos_registros, _ = self._buscar_registros_processos(classes, marca, numero_revista, limit, colunas)
+            return self._dataframe_processos(todos_registros)
+        
+        except Exception as e:
+            # Re-raise para que o erro seja tratado no Streamlit
+            erro_msg = f"Erro ao buscar processos: {str(e)}"
+            print(erro_msg)
+            raise Exception(erro_msg)
+    
+    def buscar_processos_pagina(
+        self,
+        classes: Optional[List[str]] = None,
+        numero_revista: Optional[str] = None,
+        colunas: Optional[Sequence[str]] = None,
+        apos: Optional[Dict] = None,
+        limite: int = 5000
+    ) -> Tuple[pd.DataFrame, Optional[Dict]]:
+        """
+        Busca uma página de processos, continuando de onde a página anterior parou (keyset)
+        
+        Args:
+            classes: Filtrar por lista de classes Nice (opcional)
+            numero_revista: Filtrar por número da revista (opcional)
+            colunas: Colunas de dados_marcas a trazer (como em buscar_processos)
+            apos: Cursor devolvido pela chamada anterior (None para a primeira página)
+            limite: Quantidade máxima de registros da página
             
-            if todos_registros:
-                df = pd.DataFrame(todos_registros)
-                # Mapear campos para compatibilidade com o resto do sistema
-                if 'processo' in df.columns:
-                    df['numero_processo'] = df['processo']
-                if 'empresa' in df.columns:
-                    df['titular'] = df['empresa']
-                if 'n_revista' in df.columns:
-                    df['numero_revista'] = df['n_revista']
-                if 'status' in df.columns:
-                    df['status_classe'] = df['status']
-                return df
-            else:
-                return pd.DataFrame()
+        Returns:
+            Tupla (DataFrame da página, cursor da próxima página ou None se não houver mais registros)
+        """
+        try:
+            registros, coluna_ordem = self._buscar_registros_processos(
+                classes, None, numero_revista, limite, colunas, apos
+            )
+            cursor = None
+            if len(registros) >= limite:
+                ultimo = registros[-1]
+                cursor = {'id': ultimo['id'], coluna_ordem: ultimo.get(coluna_ordem)}
+            return self._dataframe_processos(registros), cursor
         
         except Exception as e:
             # Re-raise para que o erro seja tratado no Streamlit
@@ -417,6 +546,141 @@ class DatabaseSupabase:
             print(erro_msg)
             raise Exception(erro_msg)
     
+    def _coluna_ordem_processos(self) -> str:
+        """
+        Coluna de ordenação/paginação de dados_marcas (created_at se existir, senão id)
+        
+        updated_at fica de fora: muda ao salvar verificações, o que moveria linhas através do cursor
+        entre as páginas. Descoberta com uma consulta de teste na primeira chamada e guardada na instância.
+        """
+        coluna_ordem = getattr(self, '_coluna_ordem_dados_marcas', None)
+        if coluna_ordem:
+            return coluna_ordem
+        
+        coluna_ordem = 'id'
+        for col_timestamp in ('created_at', 'id'):
+            try:
+                query_teste = self.supabase.table('dados_marcas').select('id').order(col_timestamp, desc=True).limit(1)
+                query_teste.execute()
+                coluna_ordem = col_timestamp
+                break
+            except:
+                continue
+        
+        self._coluna_ordem_dados_marcas = coluna_ordem
+        return coluna_ordem
+    
+    def _buscar_registros_processos(
+        self,
+        classes: Optional[List[str]],
+        marca: Optional[str],
+        numero_revista: Optional[str],
+        limit: Optional[int],
+        colunas: Optional[Sequence[str]],
+        apos: Optional[Dict] = None
+    ) -> Tuple[List[Dict], str]:
+        """
+        Lê os registros de dados_marcas em páginas de 1000 (keyset), a partir do cursor `apos`
+        
+        Returns:
+            Tupla (registros, coluna de ordenação usada)
+        """
+        todos_registros = []
+        tamanho_pagina = 1000
+        limite_maximo = limit
+        
+        coluna_timestamp_funcional = self._coluna_ordem_processos()
+        
+        # A coluna de ordenação precisa vir no resultado para servir de chave da próxima página
+        colunas_select = ','.join(colunas) if colunas else COLUNAS_CONSULTA_DADOS_MARCAS
+        for coluna_chave in ('id', coluna_timestamp_funcional):
+            if coluna_chave not in colunas_select.split(','):
+                colunas_select += f',{coluna_chave}'
+        
+        def consultar_pagina(ultimo: Optional[Dict], tamanho: int) -> List[Dict]:
+            query = self.supabase.table('dados_marcas').select(colunas_select)
+            
+            if classes and len(classes) > 0:
+                query = query.in_('classe', classes)
+            
+            if marca:
+                query = query.ilike('marca', f'%{marca}%')
+            
+            if numero_revista:
+                query = query.eq('n_revista', numero_revista)
+            
+            # Paginação por chave (keyset): continua a partir do último registro da página anterior,
+            # em vez de OFFSET, para o Postgres não reordenar e pular as linhas já lidas a cada página
+            if ultimo is not None:
+                query = self._filtro_apos_registro(query, coluna_timestamp_funcional, ultimo)
+            
+            query = query.order(coluna_timestamp_funcional, desc=True)
+            if coluna_timestamp_funcional != 'id':
+                query = query.order('id', desc=True)
+            
+            resultado = query.limit(tamanho).execute()
+            return resultado.data or []
+        
+        ultimo_registro = apos
+        while True:
+            tamanho = tamanho_pagina
+            if limite_maximo is not None:
+                tamanho = min(tamanho, limite_maximo - len(todos_registros))
+                if tamanho <= 0:
+                    break
+            
+            dados_pagina = consultar_pagina(ultimo_registro, tamanho)
+            todos_registros.extend(dados_pagina)
+            
+            # Se retornou menos que o tamanho da página, chegou ao fim
+            if len(dados_pagina) < tamanho:
+                break
+            
+            ultimo_registro = dados_pagina[-1]
+        
+        return todos_registros, coluna_timestamp_funcional
+    
+    @staticmethod
+    def _dataframe_processos(registros: List[Dict]) -> pd.DataFrame:
+        """Monta o DataFrame de processos (colunas category e nomes de compatibilidade) a partir dos registros"""
+        if not registros:
+            return pd.DataFrame()
+        
+        df = pd.DataFrame(registros)
+        # Colunas de poucos valores distintos como category (menos memória, groupby/nunique mais rápidos)
+        for col in _COLUNAS_CATEGORICAS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        # Mapear campos para compatibilidade com o resto do sistema (uma única cópia do DataFrame)
+        return df.assign(**{
+            nome_sistema: df[coluna_tabela]
+            for nome_sistema, coluna_tabela in _COLUNAS_COMPATIBILIDADE.items()
+            if coluna_tabela in df.columns
+        })
+    
+    @staticmethod
+    def _filtro_apos_registro(query, coluna_ordem: str, ultimo: Dict):
+        """
+        Aplica o filtro de keyset para a ordenação (coluna_ordem desc, id desc)
+        
+        Args:
+            query: Query do PostgREST
+            coluna_ordem: Coluna principal de ordenação
+            ultimo: Último registro da página anterior
+            
+        Returns:
+            Query filtrada para os registros seguintes a `ultimo`
+        """
+        ultimo_id = ultimo['id']
+        if coluna_ordem == 'id':
+            return query.lt('id', ultimo_id)
+        
+        valor = ultimo.get(coluna_ordem)
+        if valor is None:
+            # Em ordem desc os nulos vêm primeiro: seguem os nulos com id menor e depois todos os não nulos
+            return query.or_(f'{coluna_ordem}.not.is.null,and({coluna_ordem}.is.null,id.lt.{ultimo_id})')
+        return query.or_(f'{coluna_ordem}.lt."{valor}",and({coluna_ordem}.eq."{valor}",id.lt.{ultimo_id})')
+    
     def contar_processos(
         self,
         classes: Optional[List[str]] = None,
@@ -479,28 +743,19 @@ class DatabaseSupabase:
         """
         Obtém estatísticas dos processos salvos na tabela dados_marcas
         
+        As contagens são feitas no banco pela função SQL estatisticas_dados_marcas (ver INSTRUCOES.md).
+        
         Returns:
             Dicionário com estatísticas
         """
         try:
-            # Buscar todos os registros (limitado para não sobrecarregar)
-            todos_registros = self.supabase.table('dados_marcas').select('*').limit(10000).execute()
-            
-            if todos_registros.data and len(todos_registros.data) > 0:
-                df = pd.DataFrame(todos_registros.data)
-                
-                total_registros = len(df)
-                processos_unicos = df['processo'].nunique() if 'processo' in df.columns else 0
-                classes_unicas = df['classe'].nunique() if 'classe' in df.columns else 0
-            else:
-                total_registros = 0
-                processos_unicos = 0
-                classes_unicas = 0
+            resultado = self.supabase.rpc('estatisticas_dados_marcas').execute()
+            linha = resultado.data[0] if resultado.data else {}
             
             return {
-                'total_registros': total_registros,
-                'processos_unicos': processos_unicos,
-                'classes_unicas': classes_unicas
+                'total_registros': int(linha.get('total') or 0),
+                'processos_unicos': int(linha.get('processos_unicos') or 0),
+                'classes_unicas': int(linha.get('classes_unicas') or 0)
             }
         
         except Exception as e:
@@ -524,6 +779,7 @@ class DatabaseSupabase:
         """
         try:
             resultado = self.supabase.table('dados_marcas').delete().eq('n_revista', numero_revista).execute()
+            _limpar_cache_dados_marcas()
             return True
         except Exception as e:
             print(f"Erro ao deletar processos: {str(e)}")
@@ -540,6 +796,11 @@ class DatabaseSupabase:
             return str(int(s))
         return s
 
+    @staticmethod
+    def _ordenar_numeros_revista(numeros: Set[str]) -> List[str]:
+        """Ordena números de revista do mais recente para o mais antigo (não numéricos no fim)"""
+        return sorted(numeros, key=lambda x: int(x) if x.isdigit() else 0, reverse=True)
+
     def obter_revistas_processadas(self) -> List[str]:
         """
         Retorna lista de números de revistas já processadas (pagina a tabela inteira).
@@ -572,18 +833,12 @@ class DatabaseSupabase:
                     resultado = query.execute()
                 if not resultado.data:
                     break
-                for row in resultado.data:
-                    n = self._normalizar_numero_revista(row.get('n_revista'))
-                    if n:
-                        unicos.add(n)
+                unicos.update(self._normalizar_numero_revista(row.get('n_revista')) for row in resultado.data)
                 if len(resultado.data) < tamanho_pagina:
                     break
                 pagina += 1
-            return sorted(
-                unicos,
-                key=lambda x: int(str(x)) if str(x).isdigit() else 0,
-                reverse=True,
-            )
+            unicos.discard(None)
+            return self._ordenar_numeros_revista(unicos)
         except Exception as e:
             print(f"Erro ao obter revistas: {str(e)}")
             return []
@@ -658,23 +913,38 @@ class DatabaseSupabase:
         return classes
     
     # Métodos para gerenciar storage de revistas
-    def upload_revista(self, arquivo_bytes: bytes, nome_arquivo: str) -> Dict:
+    def upload_revista(self, arquivo: Union[bytes, BinaryIO], nome_arquivo: str) -> Dict:
         """
         Faz upload de uma revista para o storage do Supabase
         
+        O XML é gravado comprimido com gzip (nome_arquivo + '.gz'); listar/baixar/deletar
+        continuam usando o nome original. A compressão é feita em blocos para um arquivo
+        temporário, que é enviado em streaming (o XML não é carregado inteiro na memória).
+        
         Args:
-            arquivo_bytes: Bytes do arquivo
+            arquivo: Bytes do arquivo ou objeto file posicionado no início
             nome_arquivo: Nome do arquivo
             
         Returns:
             Dicionário com resultado da operação
         """
+        if isinstance(arquivo, bytes):
+            arquivo = BytesIO(arquivo)
+        
+        caminho_temp = None
         try:
-            resultado = self.supabase.storage.from_(self.bucket_revistas).upload(
-                nome_arquivo,
-                arquivo_bytes,
-                file_options={"content-type": "application/xml"}
-            )
+            with tempfile.NamedTemporaryFile(suffix=SUFIXO_GZIP, delete=False) as temp:
+                caminho_temp = temp.name
+                with gzip.GzipFile(fileobj=temp, mode='wb', compresslevel=6) as compactado:
+                    shutil.copyfileobj(arquivo, compactado, TAMANHO_BLOCO_UPLOAD)
+            
+            with open(caminho_temp, 'rb') as conteudo:
+                resultado = self.supabase.storage.from_(self.bucket_revistas).upload(
+                    nome_arquivo + SUFIXO_GZIP,
+                    conteudo,
+                    file_options={"content-type": "application/gzip"}
+                )
+            listar_revistas_cache.clear()
             return {
                 'sucesso': True,
                 'mensagem': f'Arquivo {nome_arquivo} enviado com sucesso!'
@@ -684,16 +954,23 @@ class DatabaseSupabase:
                 'sucesso': False,
                 'erro': str(e)
             }
+        finally:
+            if caminho_temp:
+                try:
+                    os.remove(caminho_temp)
+                except OSError:
+                    pass
     
     def listar_revistas(self) -> List[str]:
         """
-        Lista todas as revistas no storage.
-        A API do Storage pagina (padrão limit=100); percorre todas as páginas.
+        Lista todas as revistas no storage, do nome mais recente para o mais antigo.
+        A API do Storage pagina; percorre todas as páginas (1000 por chamada) já ordenadas pelo servidor.
+        Arquivos comprimidos aparecem com o nome original (sem '.gz').
         """
         try:
             nomes: List[str] = []
             offset = 0
-            limit = 100
+            limit = 1000
             bucket = self.supabase.storage.from_(self.bucket_revistas)
             while True:
                 arquivos = bucket.list(
@@ -709,11 +986,12 @@ class DatabaseSupabase:
                 for arquivo in arquivos:
                     n = arquivo.get('name')
                     if n:
-                        nomes.append(n)
+                        nomes.append(n[:-len(SUFIXO_GZIP)] if n.endswith(SUFIXO_GZIP) else n)
                 if len(arquivos) < limit:
                     break
                 offset += limit
-            return sorted(set(nomes), reverse=True)
+            # Remove repetidos (mesma revista com e sem .gz) mantendo a ordem do servidor
+            return list(dict.fromkeys(nomes))
         except Exception as e:
             print(f"Erro ao listar revistas: {str(e)}")
             return []
@@ -722,19 +1000,87 @@ class DatabaseSupabase:
         """
         Faz download de uma revista do storage
         
+        Procura primeiro a versão comprimida (nome_arquivo + '.gz') e depois o arquivo
+        original, para revistas enviadas antes da compressão. Se o mesmo arquivo já estiver
+        sendo baixado (outra sessão ou rerun), aguarda esse download em vez de fazer outro.
+        
         Args:
             nome_arquivo: Nome do arquivo para baixar
             
         Returns:
-            Bytes do arquivo ou None em caso de erro
+            Bytes do arquivo (XML descomprimido) ou None em caso de erro
         """
+        with self._downloads_lock:
+            futuro = self._downloads_em_andamento.get(nome_arquivo)
+            responsavel = futuro is None
+            if responsavel:
+                futuro = Future()
+                self._downloads_em_andamento[nome_arquivo] = futuro
+        
+        if not responsavel:
+            return futuro.result()
+        
         try:
-            resultado = self.supabase.storage.from_(self.bucket_revistas).download(nome_arquivo)
+            resultado = self._baixar_revista(nome_arquivo)
+            futuro.set_result(resultado)
+            return resultado
+        except BaseException as e:
+            futuro.set_exception(e)
+            raise
+        finally:
+            with self._downloads_lock:
+                self._downloads_em_andamento.pop(nome_arquivo, None)
+    
+    def _baixar_revista(self, nome_arquivo: str) -> Optional[bytes]:
+        """Baixa e descomprime a revista do storage (None em caso de erro)"""
+        bucket = self.supabase.storage.from_(self.bucket_revistas)
+        try:
+            try:
+                resultado = bucket.download(nome_arquivo + SUFIXO_GZIP)
+            except Exception:
+                resultado = bucket.download(nome_arquivo)
+            # O cliente HTTP pode já ter descomprimido; só descomprime se ainda houver o cabeçalho gzip
+            if resultado[:2] == b'\x1f\x8b':
+                return gzip.decompress(resultado)
             return resultado
         except Exception as e:
             print(f"Erro ao baixar revista: {str(e)}")
             return None
     
+    def abrir_stream_revista(self, nome_arquivo: str) -> Optional[BinaryIO]:
+        """
+        Abre uma revista do storage para leitura em streaming (o XML pode ser processado enquanto chega)
+        
+        Usa uma URL assinada e o httpx.Client compartilhado. Procura primeiro a versão comprimida
+        (nome_arquivo + '.gz'), descomprimida durante a leitura, e depois o arquivo original.
+        
+        Args:
+            nome_arquivo: Nome do arquivo para abrir
+            
+        Returns:
+            Objeto file (feche após o uso) com o XML descomprimido ou None se não for possível
+            abrir o stream (use download_revista)
+        """
+        if self._cliente_http is None:
+            return None
+        
+        bucket = self.supabase.storage.from_(self.bucket_revistas)
+        for nome in (nome_arquivo + SUFIXO_GZIP, nome_arquivo):
+            try:
+                url = bucket.create_signed_url(nome, 60).get('signedURL')
+                if not url:
+                    continue
+                resposta = self._cliente_http.send(self._cliente_http.build_request('GET', url), stream=True)
+            except Exception:
+                continue
+            if resposta.status_code != 200:
+                resposta.close()
+                continue
+            return io.BufferedReader(_StreamRevista(resposta, nome_arquivo), buffer_size=TAMANHO_BLOCO_UPLOAD)
+        
+        print(f"Erro ao abrir stream da revista: {nome_arquivo}")
+        return None
+    
     def deletar_revista(self, nome_arquivo: str) -> bool:
         """
         Deleta uma revista do storage
@@ -746,7 +1092,9 @@ class DatabaseSupabase:
             True se sucesso, False caso contrário
         """
         try:
-            self.supabase.storage.from_(self.bucket_revistas).remove([nome_arquivo])
+            # Remove a versão comprimida e a original (nomes inexistentes são ignorados)
+            self.supabase.storage.from_(self.bucket_revistas).remove([nome_arquivo + SUFIXO_GZIP, nome_arquivo])
+            listar_revistas_cache.clear()
             return True
         except Exception as e:
             print(f"Erro ao deletar revista: {str(e)}")
@@ -776,6 +1124,7 @@ class DatabaseSupabase:
             
             # Verificar se realmente foi inserido
             if resultado.data and len(resultado.data) > 0:
+                listar_revistas_registradas_cache.clear()
                 return {
                     'sucesso': True,
                     'mensagem': f'Revista {numero_revista} registrada com sucesso!',
@@ -809,6 +1158,68 @@ class DatabaseSupabase:
                 'erro': erro_completo
             }
     
+    def salvar_numeros_revistas(self, numeros_revista: List[str]) -> Dict:
+        """
+        Salva vários números de revista na tabela revista em uma única requisição
+        
+        Usa upsert ignorando os números já registrados (requer UNIQUE em numero_revista).
+        Sem a constraint, registra um a um com salvar_numero_revista.
+        
+        Args:
+            numeros_revista: Números das revistas
+            
+        Returns:
+            Dicionário com resultado da operação
+        """
+        numeros = list(dict.fromkeys(
+            str(n).strip() for n in numeros_revista if n is not None and str(n).strip()
+        ))
+        if not numeros:
+            return {
+                'sucesso': False,
+                'erro': 'Número da revista não pode estar vazio'
+            }
+        
+        try:
+            self.supabase.table('revista').upsert(
+                [{'numero_revista': n} for n in numeros],
+                on_conflict='numero_revista',
+                ignore_duplicates=True
+            ).execute()
+            listar_revistas_registradas_cache.clear()
+            return {
+                'sucesso': True,
+                'mensagem': f'{len(numeros)} revista(s) registrada(s) com sucesso!'
+            }
+        except Exception as e:
+            erro_completo = str(e)
+            
+            # 42P10: não existe constraint UNIQUE em numero_revista para o on_conflict
+            if '42P10' in erro_completo or 'on conflict' in erro_completo.lower():
+                erros = [
+                    resultado.get('erro', 'Erro desconhecido')
+                    for resultado in map(self.salvar_numero_revista, numeros)
+                    if not resultado.get('sucesso')
+                ]
+                if erros:
+                    return {'sucesso': False, 'erro': '; '.join(erros)}
+                return {
+                    'sucesso': True,
+                    'mensagem': f'{len(numeros)} revista(s) registrada(s) com sucesso!'
+                }
+            
+            # Verificar se é erro de RLS
+            if 'row-level security' in erro_completo.lower() or '42501' in erro_completo:
+                return {
+                    'sucesso': False,
+                    'erro': f'Erro de Row Level Security (RLS) na tabela revista. É necessário criar uma política INSERT. Erro: {erro_completo}'
+                }
+            
+            return {
+                'sucesso': False,
+                'erro': erro_completo
+            }
+    
     def listar_revistas_registradas(self) -> List[str]:
         """
         Lista todas as revistas registradas na tabela revista (paginado).
@@ -835,18 +1246,12 @@ class DatabaseSupabase:
                     )
                 if not resultado.data:
                     break
-                for r in resultado.data:
-                    n = self._normalizar_numero_revista(r.get('numero_revista'))
-                    if n:
-                        vistos.add(n)
+                vistos.update(self._normalizar_numero_revista(r.get('numero_revista')) for r in resultado.data)
                 if len(resultado.data) < tamanho:
                     break
                 pagina += 1
-            return sorted(
-                vistos,
-                key=lambda x: int(str(x)) if str(x).isdigit() else 0,
-                reverse=True,
-            )
+            vistos.discard(None)
+            return self._ordenar_numeros_revista(vistos)
         except Exception as e:
             print(f"Erro ao listar revistas registradas: {str(e)}")
             return []
@@ -862,8 +1267,15 @@ class DatabaseSupabase:
         Returns:
             Dicionário com resultado da operação
         """
+        resultado = self._enviar_verificacao(processo, verificacao)
+        if resultado['sucesso']:
+            _limpar_cache_dados_marcas()
+        return resultado
+    
+    def _enviar_verificacao(self, processo: str, verificacao: str) -> Dict:
+        """PATCH da verificação de um processo, sem invalidar os caches (quem chama limpa uma vez)"""
         try:
-            resultado = self.supabase.table('dados_marcas').update({
+            self.supabase.table('dados_marcas').update({
                 'verificacao': verificacao if verificacao else None
             }).eq('processo', processo).execute()
             
@@ -881,6 +1293,42 @@ class DatabaseSupabase:
         """
         Atualiza múltiplas verificações de uma vez
         
+        Usa a função SQL atualizar_verificacoes_lote (um único UPDATE no servidor, ver INSTRUCOES.md).
+        Se a função não existir no projeto, atualiza processo a processo.
+        
+        Args:
+            verificacoes: Dicionário com {processo: verificacao}
+            
+        Returns:
+            Dicionário com resultado da operação
+        """
+        if not verificacoes:
+            return {'sucesso': False, 'sucessos': 0, 'total': 0, 'erros': []}
+        
+        try:
+            payload = [
+                {'processo': processo, 'verificacao': verificacao if verificacao else None}
+                for processo, verificacao in verificacoes.items()
+            ]
+            resultado = self.supabase.rpc('atualizar_verificacoes_lote', {'payload': payload}).execute()
+            sucessos = resultado.data if isinstance(resultado.data, int) else len(verificacoes)
+            _limpar_cache_dados_marcas()
+            
+            return {
+                'sucesso': sucessos > 0,
+                'sucessos': sucessos,
+                'total': len(verificacoes),
+                'erros': []
+            }
+        except Exception as e:
+            print(f"RPC atualizar_verificacoes_lote indisponível, atualizando individualmente: {str(e)}")
+        
+        return self._atualizar_verificacoes_individualmente(verificacoes)
+    
+    def _atualizar_verificacoes_individualmente(self, verificacoes: Dict[str, str]) -> Dict:
+        """
+        Atualiza as verificações com um PATCH por processo (fallback sem a função SQL)
+        
         Args:
             verificacoes: Dicionário com {processo: verificacao}
             
@@ -890,9 +1338,15 @@ class DatabaseSupabase:
         try:
             sucessos = 0
             erros = []
-            
-            for processo, verificacao in verificacoes.items():
-                resultado = self.atualizar_verificacao(processo, verificacao)
+
+            # Um PATCH por processo: dispara em paralelo para sobrepor a latência de rede
+            itens = list(verificacoes.items())
+            with ThreadPoolExecutor(max_workers=MAX_REQUISICOES_PARALELAS) as executor:
+                resultados = list(executor.map(lambda item: self._enviar_verificacao(*item), itens))
+            # Caches invalidados uma vez para o lote inteiro (não a cada PATCH)
+            _limpar_cache_dados_marcas()
+
+            for (processo, _), resultado in zip(itens, resultados):
                 if resultado['sucesso']:
                     sucessos += 1
                 else:
@@ -910,3 +1364,43 @@ class DatabaseSupabase:
                 'erro': str(e)
             }
 
+
+# Leituras cacheadas para a interface: o Streamlit reexecuta o script a cada interação, então as
+# consultas repetidas com os mesmos filtros são servidas da memória por até 5 minutos.
+# O parâmetro _db (com "_") não entra na chave do cache; os métodos de escrita limpam os caches.
+@st.cache_data(ttl=300, show_spinner=False)
+def buscar_processos_pagina_cache(
+    _db: DatabaseSupabase,
+    classes: Optional[List[str]] = None,
+    numero_revista: Optional[str] = None,
+    colunas: Optional[Tuple[str, ...]] = None,
+    apos: Optional[Dict] = None,
+    limite: int = 5000
+) -> Tuple[pd.DataFrame, Optional[Dict]]:
+    """Versão cacheada de DatabaseSupabase.buscar_processos_pagina"""
+    return _db.buscar_processos_pagina(
+        classes=classes, numero_revista=numero_revista, colunas=colunas, apos=apos, limite=limite
+    )
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def listar_revistas_registradas_cache(_db: DatabaseSupabase) -> List[str]:
+    """Versão cacheada de DatabaseSupabase.listar_revistas_registradas"""
+    return _db.listar_revistas_registradas()
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def listar_revistas_cache(_db: DatabaseSupabase) -> List[str]:
+    """Versão cacheada de DatabaseSupabase.listar_revistas (arquivos no storage)"""
+    return _db.listar_revistas()
+
+
+def limpar_cache_revistas():
+    """Invalida as listas cacheadas de revistas (storage e tabela revista)"""
+    listar_revistas_cache.clear()
+    listar_revistas_registradas_cache.clear()
+
+
+def _limpar_cache_dados_marcas():
+    """Invalida as leituras cacheadas de dados_marcas após uma escrita"""
+    buscar_processos_pagina_cache.clear()
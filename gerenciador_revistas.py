@@ -2,10 +2,26 @@
 Módulo para gerenciar upload e download de revistas no Supabase
 """
 import re
+import shutil
+import tempfile
 import streamlit as st
-import xml.etree.ElementTree as ET
-from database_supabase import DatabaseSupabase
-from typing import Dict, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from database_supabase import (
+    DatabaseSupabase,
+    limpar_cache_revistas,
+    listar_revistas_cache,
+    listar_revistas_registradas_cache,
+)
+from processador_inpi import ler_numero_revista_xml
+from io import BytesIO
+from typing import BinaryIO, Dict, Iterator, Optional, List, Tuple
+
+# Uploads simultâneos para o storage ao enviar várias revistas
+MAX_UPLOADS_PARALELOS = 6
+# Downloads simultâneos do storage ao processar várias revistas
+MAX_DOWNLOADS_PARALELOS = 4
+# Acima deste tamanho uma revista baixada passa da memória para um arquivo temporário em disco
+LIMITE_REVISTA_EM_MEMORIA = 16 * 1024 * 1024
 
 
 class GerenciadorRevistas:
@@ -22,7 +38,10 @@ class GerenciadorRevistas:
     
     def upload_revista(self, arquivo_revista) -> Dict:
         """
-        Faz upload de uma revista para o storage e registra o número na tabela revista
+        Faz upload de uma revista para o storage
+        
+        O número da revista não é gravado aqui: vai em 'numero_revista' no resultado para ser
+        registrado em lote com registrar_numeros_revistas após todos os uploads.
         
         Args:
             arquivo_revista: Arquivo uploader do Streamlit
@@ -38,47 +57,51 @@ class GerenciadorRevistas:
             nome_arquivo = arquivo_revista.name
             numero_revista = None
             
-            # Tentar extrair número da revista do XML
+            # Tentar extrair número da revista do XML (lê só até a tag <revista>)
             try:
                 arquivo_revista.seek(0)
-                tree = ET.parse(arquivo_revista)
-                root = tree.getroot()
-                if root.tag.lower() == 'revista':
-                    numero_revista = root.get('numero', '')
-                    if numero_revista:
-                        nome_arquivo = f"revista_{numero_revista}.xml"
+                numero_revista = ler_numero_revista_xml(arquivo_revista)
+                if numero_revista:
+                    nome_arquivo = f"revista_{numero_revista}.xml"
                 arquivo_revista.seek(0)
             except:
                 pass
             
-            # Fazer upload para o storage
-            arquivo_bytes = arquivo_revista.read()
-            resultado = self.db.upload_revista(arquivo_bytes, nome_arquivo)
-            
-            # Se o upload foi bem-sucedido e temos o número da revista, salvar na tabela revista
-            if resultado.get('sucesso') and numero_revista:
-                try:
-                    resultado_revista = self.db.salvar_numero_revista(numero_revista)
-                    # Não falhar o upload se o registro na tabela falhar (pode ser duplicata ou RLS)
-                    if not resultado_revista.get('sucesso'):
-                        # Adicionar aviso ao resultado
-                        erro_revista = resultado_revista.get('erro', 'Erro desconhecido')
-                        resultado['aviso'] = f"Número da revista {numero_revista} não foi registrado na tabela: {erro_revista}"
-                        # Log do erro
-                        print(f"Aviso: Não foi possível registrar número da revista {numero_revista}: {erro_revista}")
-                    else:
-                        resultado['mensagem_revista'] = resultado_revista.get('mensagem', f'Revista {numero_revista} registrada')
-                except Exception as e:
-                    # Não falhar o upload se houver erro ao salvar número
-                    erro_msg = str(e)
-                    resultado['aviso'] = f"Erro ao salvar número da revista {numero_revista}: {erro_msg}"
-                    print(f"Aviso: Erro ao salvar número da revista {numero_revista}: {erro_msg}")
-            
+            # Fazer upload para o storage (o arquivo é lido em blocos, sem cópia inteira em memória)
+            arquivo_revista.seek(0)
+            resultado = self.db.upload_revista(arquivo_revista, nome_arquivo)
+            resultado['numero_revista'] = numero_revista
             return resultado
         
         except Exception as e:
             return {'sucesso': False, 'erro': str(e)}
     
+    def registrar_numeros_revistas(self, numeros_revista: List[str]) -> Optional[str]:
+        """
+        Registra na tabela revista os números das revistas enviadas (uma única requisição)
+        
+        Args:
+            numeros_revista: Números extraídos dos XML enviados
+            
+        Returns:
+            Mensagem de aviso se o registro falhar, None caso contrário
+        """
+        if not numeros_revista:
+            return None
+        try:
+            resultado_revista = self.db.salvar_numeros_revistas(numeros_revista)
+            # Não falhar o upload se o registro na tabela falhar (pode ser RLS)
+            if not resultado_revista.get('sucesso'):
+                erro_revista = resultado_revista.get('erro', 'Erro desconhecido')
+                print(f"Aviso: Não foi possível registrar números das revistas {', '.join(numeros_revista)}: {erro_revista}")
+                return f"Números das revistas {', '.join(numeros_revista)} não foram registrados na tabela: {erro_revista}"
+        except Exception as e:
+            # Não falhar o upload se houver erro ao salvar números
+            erro_msg = str(e)
+            print(f"Aviso: Erro ao salvar números das revistas: {erro_msg}")
+            return f"Erro ao salvar números das revistas {', '.join(numeros_revista)}: {erro_msg}"
+        return None
+    
     def listar_revistas_disponiveis(self) -> List[str]:
         """
         Lista todas as revistas disponíveis (storage + registradas)
@@ -87,28 +110,18 @@ class GerenciadorRevistas:
             Lista de nomes de arquivos de revistas
         """
         try:
-            # Listar revistas do storage
-            revistas_storage = self.db.listar_revistas()
-            # Listar revistas registradas na tabela
-            revistas_registradas = self.db.listar_revistas_registradas()
-            
-            # Combinar e ordenar revistas
-            todas_revistas = []
-            if revistas_storage:
-                todas_revistas.extend(revistas_storage)
-            if revistas_registradas:
-                # Adicionar revistas registradas que não estão no storage
-                for r in revistas_registradas:
-                    nome_arquivo = f"revista_{r}.xml"
-                    if nome_arquivo not in todas_revistas and r not in todas_revistas:
-                        todas_revistas.append(nome_arquivo)
-            
-            return sorted(todas_revistas, reverse=True)
+            return _listar_revistas_disponiveis_cache(self.db)
         
         except Exception as e:
             st.error(f"Erro ao listar revistas: {str(e)}")
             return []
     
+    @staticmethod
+    def limpar_cache():
+        """Invalida as listas de revistas cacheadas (usar após upload, exclusão ou em "Atualizar lista")"""
+        _listar_revistas_disponiveis_cache.clear()
+        limpar_cache_revistas()
+    
     @staticmethod
     def _normalizar_digitos_numero_revista(s: str) -> str:
         """Remove zeros à esquerda para bater com n_revista gravado no banco."""
@@ -146,7 +159,7 @@ class GerenciadorRevistas:
         """
         if not numeros_revista_com_dados:
             return []
-        no_storage = set(self.db.listar_revistas())
+        no_storage = set(listar_revistas_cache(self.db))
         alvo = set()
         for x in numeros_revista_com_dados:
             if x is None:
@@ -175,7 +188,7 @@ class GerenciadorRevistas:
         if not num:
             return None
         try:
-            no_storage = self.db.listar_revistas()
+            no_storage = listar_revistas_cache(self.db)
         except Exception:
             no_storage = []
         candidato = f"revista_{num}.xml"
@@ -202,6 +215,106 @@ class GerenciadorRevistas:
             st.error(f"Erro ao baixar revista: {str(e)}")
             return None
     
+    def abrir_stream_revista(self, nome_arquivo: str) -> Optional[BinaryIO]:
+        """
+        Abre uma revista para leitura em streaming (processamento enquanto o download acontece)
+        
+        Args:
+            nome_arquivo: Nome do arquivo para abrir
+            
+        Returns:
+            Objeto file (feche após o uso) ou None se não for possível; nesse caso use download_revista
+        """
+        try:
+            return self.db.abrir_stream_revista(nome_arquivo)
+        except Exception:
+            return None
+    
+    def baixar_revistas(self, nomes_arquivos: List[str]) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """
+        Baixa várias revistas em paralelo, entregando-as na ordem pedida assim que cada uma fica pronta
+        
+        As seguintes continuam baixando enquanto quem consome processa a atual. Os downloads rodam
+        em threads sem contexto do Streamlit, por isso chamam o banco direto (erros viram None).
+        
+        Args:
+            nomes_arquivos: Nomes dos arquivos para baixar
+            
+        Returns:
+            Iterador de (nome_arquivo, bytes do arquivo ou None em caso de erro)
+        """
+        if not nomes_arquivos:
+            return
+        with ThreadPoolExecutor(max_workers=min(MAX_DOWNLOADS_PARALELOS, len(nomes_arquivos))) as executor:
+            yield from zip(nomes_arquivos, executor.map(self.db.download_revista, nomes_arquivos))
+    
+    def _baixar_para_arquivo(self, nome_arquivo: str) -> Optional[BinaryIO]:
+        """
+        Baixa uma revista em streaming para um arquivo temporário (em memória até LIMITE_REVISTA_EM_MEMORIA)
+        
+        Roda nas threads de abrir_revistas, por isso chama o banco direto. Se o streaming não
+        estiver disponível, usa download_revista (bytes inteiros em memória).
+        
+        Args:
+            nome_arquivo: Nome do arquivo para baixar
+            
+        Returns:
+            Objeto file posicionado no início (feche após o uso) ou None em caso de erro
+        """
+        try:
+            stream = self.db.abrir_stream_revista(nome_arquivo)
+        except Exception:
+            stream = None
+        if stream is not None:
+            arquivo = tempfile.SpooledTemporaryFile(max_size=LIMITE_REVISTA_EM_MEMORIA)
+            try:
+                with stream:
+                    shutil.copyfileobj(stream, arquivo)
+                arquivo.seek(0)
+                return arquivo
+            except Exception:
+                arquivo.close()
+        
+        conteudo = self.db.download_revista(nome_arquivo)
+        return BytesIO(conteudo) if conteudo else None
+    
+    def abrir_revistas(self, nomes_arquivos: List[str]) -> Iterator[Tuple[str, Optional[BinaryIO]]]:
+        """
+        Abre várias revistas para processamento, na ordem pedida
+        
+        Uma única revista XML é lida em streaming (processada enquanto chega); várias XML são baixadas
+        em paralelo para arquivos temporários (_baixar_para_arquivo) enquanto as anteriores são
+        processadas, sem manter cada revista inteira em memória. Outros formatos usam baixar_revistas.
+        
+        Args:
+            nomes_arquivos: Nomes dos arquivos para abrir
+            
+        Returns:
+            Iterador de (nome_arquivo, objeto file ou None em caso de erro); feche cada arquivo após o uso.
+            Só os formatos que não são XML (lidos por processar_arquivo_upload) garantem o atributo name;
+            os arquivos temporários das revistas XML não o têm
+        """
+        if not nomes_arquivos:
+            return
+        if len(nomes_arquivos) == 1 and nomes_arquivos[0].lower().endswith('.xml'):
+            arquivo = self.abrir_stream_revista(nomes_arquivos[0])
+            if arquivo is not None:
+                yield nomes_arquivos[0], arquivo
+                return
+        
+        if all(nome.lower().endswith('.xml') for nome in nomes_arquivos):
+            with ThreadPoolExecutor(max_workers=min(MAX_DOWNLOADS_PARALELOS, len(nomes_arquivos))) as executor:
+                yield from zip(nomes_arquivos, executor.map(self._baixar_para_arquivo, nomes_arquivos))
+            return
+        
+        for nome_arquivo, conteudo in self.baixar_revistas(nomes_arquivos):
+            if not conteudo:
+                yield nome_arquivo, None
+                continue
+            arquivo = BytesIO(conteudo)
+            arquivo.name = nome_arquivo
+            yield nome_arquivo, arquivo
+    
     def deletar_revista(self, nome_arquivo: str) -> bool:
         """
         Deleta uma revista do storage
@@ -213,7 +326,10 @@ class GerenciadorRevistas:
             True se sucesso, False caso contrário
         """
         try:
-            return self.db.deletar_revista(nome_arquivo)
+            deletado = self.db.deletar_revista(nome_arquivo)
+            if deletado:
+                self.limpar_cache()
+            return deletado
         except Exception as e:
             st.error(f"Erro ao deletar revista: {str(e)}")
             return False
@@ -234,29 +350,37 @@ class GerenciadorRevistas:
                 avisos = []
                 
                 with st.spinner(f"Enviando {len(arquivos_revista)} revista(s) para o storage..."):
-                    for arquivo_revista in arquivos_revista:
-                        resultado = self.upload_revista(arquivo_revista)
-                        
+                    # Uploads são limitados pela rede: envia vários arquivos ao mesmo tempo
+                    with ThreadPoolExecutor(max_workers=min(MAX_UPLOADS_PARALELOS, len(arquivos_revista))) as executor:
+                        resultados = list(executor.map(self.upload_revista, arquivos_revista))
+                    
+                    numeros_enviados = []
+                    for arquivo_revista, resultado in zip(arquivos_revista, resultados):
                         if resultado['sucesso']:
                             sucessos += 1
-                            # Verificar se há avisos sobre registro do número da revista
-                            if 'aviso' in resultado:
-                                avisos.append(f"{arquivo_revista.name}: {resultado['aviso']}")
+                            if resultado.get('numero_revista'):
+                                numeros_enviados.append(resultado['numero_revista'])
                         else:
                             erros.append(f"{arquivo_revista.name}: {resultado.get('erro', 'Erro desconhecido')}")
+                    
+                    # Registrar os números de todas as revistas enviadas de uma vez
+                    aviso_registro = self.registrar_numeros_revistas(numeros_enviados)
+                    if aviso_registro:
+                        avisos.append(aviso_registro)
                 
                 if sucessos > 0:
                     st.success(f"✅ {sucessos} revista(s) enviada(s) para o storage com sucesso!")
                 if avisos:
                     st.warning(f"⚠️ {len(avisos)} aviso(s):")
-                    for aviso in avisos:
-                        st.text(f"  - {aviso}")
+                    st.text("\n".join(f"  - {aviso}" for aviso in avisos))
                 if erros:
                     st.error(f"❌ {len(erros)} erro(s) ao enviar:")
-                    for erro in erros:
-                        st.text(f"  - {erro}")
+                    st.text("\n".join(f"  - {erro}" for erro in erros[:10]))
+                    if len(erros) > 10:
+                        st.caption(f"... e mais {len(erros) - 10}.")
                 
                 if sucessos > 0:
+                    self.limpar_cache()
                     st.rerun()
     
     def renderizar_download(self):
@@ -264,6 +388,7 @@ class GerenciadorRevistas:
         st.subheader("📥 Download de Revistas")
         
         if st.button("🔄 Atualizar Lista", key="refresh_revistas"):
+            self.limpar_cache()
             st.rerun()
         
         revistas = self.listar_revistas_disponiveis()
@@ -306,3 +431,26 @@ class GerenciadorRevistas:
         else:
             st.info("Nenhuma revista encontrada no storage.")
 
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _listar_revistas_disponiveis_cache(_db: DatabaseSupabase) -> List[str]:
+    """Lista combinada (storage + tabela revista) usada por GerenciadorRevistas.listar_revistas_disponiveis"""
+    # Listar revistas do storage
+    revistas_storage = listar_revistas_cache(_db)
+    # Listar revistas registradas na tabela
+    revistas_registradas = listar_revistas_registradas_cache(_db)
+    
+    # Combinar e ordenar revistas
+    todas_revistas = []
+    if revistas_storage:
+        todas_revistas.extend(revistas_storage)
+    if revistas_registradas:
+        # Adicionar revistas registradas que não estão no storage
+        presentes = set(todas_revistas)
+        for r in revistas_registradas:
+            nome_arquivo = f"revista_{r}.xml"
+            if nome_arquivo not in presentes and r not in presentes:
+                todas_revistas.append(nome_arquivo)
+                presentes.add(nome_arquivo)
+    
+    return sorted(todas_revistas, reverse=True)
@@ -2,11 +2,63 @@
 Módulo auxiliar para processamento de arquivos da Revista do INPI
 """
 import pandas as pd
-import xml.etree.ElementTree as ET
+import numpy as np
 from io import BytesIO
 from pathlib import Path
-from typing import Optional, List, Dict, Tuple
+from typing import Optional, List, Dict, FrozenSet, Sequence, Tuple
 import re
+import functools
+import codecs
+
+# lxml (parser libxml2 em C) quando disponível; ElementTree da biblioteca padrão como alternativa
+try:
+    from lxml import etree as ET
+    # huge_tree: revistas grandes ultrapassam limites padrão do libxml2
+    _OPCOES_ITERPARSE = {'huge_tree': True}
+except ImportError:
+    import xml.etree.ElementTree as ET
+    _OPCOES_ITERPARSE = {}
+
+# Normalização de classes Nice: primeiro número do texto (ex: "03", "Classe 5", "Cl. 42") e valores vazios
+_PADRAO_NUMERO_CLASSE = re.compile(r'(\d+)')
+_VALORES_CLASSE_INVALIDOS = frozenset({'n/a', 'nan', 'none', ''})
+
+# Leitor opcional de Excel: calamine (em Rust); sem ele, engine padrão do pandas
+try:
+    import python_calamine  # noqa: F401
+    _ENGINE_EXCEL = 'calamine'
+except ImportError:
+    _ENGINE_EXCEL = 'openpyxl'
+
+# Aho-Corasick (pyahocorasick) para buscar muitas palavras-chave numa só passada; sem ele, regex
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+def ler_numero_revista_xml(arquivo) -> Optional[str]:
+    """
+    Lê o atributo numero da revista parando no primeiro elemento <revista>, sem percorrer o XML inteiro
+    
+    Args:
+        arquivo: Caminho ou objeto file do arquivo XML
+        
+    Returns:
+        Número da revista ou None se não encontrado
+    """
+    try:
+        primeiro = True
+        for _, elem in ET.iterparse(arquivo, events=('start',), **_OPCOES_ITERPARSE):
+            if elem.tag == 'revista' or (primeiro and elem.tag.lower() == 'revista'):
+                numero_revista = elem.get('numero', None)
+                if numero_revista is not None and str(numero_revista).strip():
+                    return str(numero_revista).strip()
+                return None
+            primeiro = False
+    except Exception:
+        pass
+    return None
 
 
 class ProcessadorINPI:
@@ -35,26 +87,29 @@ class ProcessadorINPI:
         "relojoaria", "Caixas", "relógio", "Joia", "ouro", "pérolas", "pedras", "metal", "prata"
     ]
     
+    # Colunas do DataFrame de processos concedidos (uma linha por classe deferida)
+    CAMPOS_PROCESSO = (
+        'numero_processo', 'marca', 'classe', 'titular', 'procurador',
+        'data_concessao', 'status_classe', 'especificacao', 'traducao_especificacao'
+    )
+    
+    # Nomes possíveis (em minúsculas) de cada coluna, usados por _encontrar_coluna
+    NOMES_COLUNA_STATUS = ('situacao', 'status', 'situacao_processo', 'estado')
+    NOMES_COLUNA_CLASSE = ('classe', 'classe_nice', 'class')
+    NOMES_COLUNA_ESPECIFICACAO = ('especificacao', 'especificação', 'specification')
+    NOMES_COLUNA_MARCA = ('marca', 'nome_marca', 'marca_nome')
+    NOMES_COLUNA_REVISTA = ('n_revista', 'numero_revista', 'revista')
+    
     def __init__(self):
         self.df_processos: Optional[pd.DataFrame] = None
+        # Regex de palavras-chave já compiladas, por tupla de palavras
+        self._padroes_palavras: Dict[Tuple[str, ...], re.Pattern] = {}
+        # Autômatos Aho-Corasick já montados (quando pyahocorasick está instalado), por tupla de palavras
+        self._automatos_palavras: Dict[Tuple[str, ...], object] = {}
     
     def ler_numero_revista_xml_bytes(self, conteudo: bytes) -> Optional[str]:
         """Lê apenas o atributo numero da revista no XML (sem processar processos)."""
-        try:
-            tree = ET.parse(BytesIO(conteudo))
-            root = tree.getroot()
-            numero_revista = None
-            if root.tag.lower() == 'revista':
-                numero_revista = root.get('numero', None)
-            else:
-                revista_elem = root.find('.//revista')
-                if revista_elem is not None:
-                    numero_revista = revista_elem.get('numero', None)
-            if numero_revista is not None and str(numero_revista).strip():
-                return str(numero_revista).strip()
-        except Exception:
-            pass
-        return None
+        return ler_numero_revista_xml(BytesIO(conteudo))
     
     def processar_xml(self, caminho_arquivo) -> Tuple[pd.DataFrame, Optional[str]]:
         """
@@ -69,62 +124,93 @@ class ProcessadorINPI:
             Uma linha por classe deferida
         """
         try:
-            tree = ET.parse(caminho_arquivo)
-            root = tree.getroot()
-            
-            # Extrair número da revista
             numero_revista = None
-            if root.tag.lower() == 'revista':
-                numero_revista = root.get('numero', None)
-            else:
-                # Tentar encontrar elemento revista
-                revista_elem = root.find('.//revista')
-                if revista_elem is not None:
-                    numero_revista = revista_elem.get('numero', None)
+            revista_encontrada = False
+            # Uma lista por coluna (o DataFrame é montado direto das colunas no final)
+            colunas = {campo: [] for campo in self.CAMPOS_PROCESSO}
             
-            processos = []
-            
-            # Buscar todos os processos na revista
-            for processo in root.findall('.//processo'):
-                # Verificar se tem despacho de concessão (IPAS158)
-                despachos = processo.findall('.//despacho')
-                tem_concessao = False
+            # Leitura em streaming (iterparse): cada <processo> é tratado ao ser fechado e depois
+            # removido da árvore, então a memória fica limitada a um processo por vez
+            pilha = []  # elementos abertos (caminho da raiz até o elemento atual)
+            processos_abertos = 0
+            for evento, elem in ET.iterparse(caminho_arquivo, events=('start', 'end'), **_OPCOES_ITERPARSE):
+                if evento == 'start':
+                    # Extrair número da revista (raiz <revista> ou primeiro elemento revista)
+                    if not revista_encontrada and (elem.tag == 'revista' or (not pilha and elem.tag.lower() == 'revista')):
+                        numero_revista = elem.get('numero', None)
+                        revista_encontrada = True
+                    if elem.tag == 'processo':
+                        processos_abertos += 1
+                    pilha.append(elem)
+                    continue
+                
+                pilha.pop()
+                if elem.tag != 'processo':
+                    continue
+                processos_abertos -= 1
                 
-                for despacho in despachos:
-                    codigo = despacho.get('codigo', '')
-                    # Apenas IPAS158 - Concessão de registro
-                    if codigo == 'IPAS158':
-                        tem_concessao = True
-                        break
+                # Extrair dados se o processo tiver despacho de concessão (uma linha para cada classe deferida)
+                self._extrair_dados_processo_inpi(elem, colunas)
                 
-                if tem_concessao:
-                    # Extrair dados do processo concedido
-                    dados_processo = self._extrair_dados_processo_inpi(processo)
-                    
-                    if dados_processo:
-                        # Adicionar uma linha para cada classe deferida
-                        processos.extend(dados_processo)
+                # Liberar o processo já lido (se estiver dentro de outro processo, o externo ainda precisa dele)
+                if pilha and processos_abertos == 0:
+                    pilha[-1].remove(elem)
             
-            if processos:
-                return pd.DataFrame(processos), numero_revista
+            if colunas['numero_processo']:
+                df = pd.DataFrame(colunas)
+                # Poucas classes distintas por revista: categórico (códigos inteiros) no groupby/isin
+                df['classe'] = df['classe'].astype('category')
+                return df, numero_revista
             else:
                 return pd.DataFrame(), numero_revista
         
         except Exception as e:
             raise Exception(f"Erro ao processar XML: {str(e)}")
     
-    def _extrair_dados_processo_inpi(self, processo) -> List[Dict]:
+    def _extrair_dados_processo_inpi(self, processo, colunas: Dict[str, List]) -> int:
         """
         Extrai dados de um processo concedido do XML do INPI
-        Retorna uma lista de dicionários, uma entrada por classe deferida
+        Acrescenta uma linha por classe deferida nas listas de colunas
+        
+        A subárvore do processo é percorrida uma única vez (despachos, titular, marca, procurador e
+        classes são reconhecidos pela tag), em vez de uma busca './/' para cada campo.
         
         Args:
             processo: Elemento XML do processo
+            colunas: Dicionário {campo: lista} com as colunas de CAMPOS_PROCESSO (alterado no lugar)
             
         Returns:
-            Lista de dicionários com dados do processo e classes deferidas
+            Quantidade de linhas acrescentadas (0 se o processo não tiver despacho IPAS158)
         """
-        processos_classe = []
+        linhas = 0
+        
+        tem_concessao = False
+        titular_elem = None
+        marca_elem = None
+        procurador_elem = None
+        classes_nice = []
+        
+        for elem in processo.iter():
+            tag = elem.tag
+            if tag == 'despacho':
+                # Apenas IPAS158 - Concessão de registro
+                if elem.get('codigo', '') == 'IPAS158':
+                    tem_concessao = True
+            elif tag == 'classe-nice':
+                classes_nice.append(elem)
+            elif tag == 'titular':
+                if titular_elem is None:
+                    titular_elem = elem
+            elif tag == 'marca':
+                # Primeira <marca> que tiver <nome>
+                if marca_elem is None and elem.find('nome') is not None:
+                    marca_elem = elem.find('nome')
+            elif tag == 'procurador':
+                if procurador_elem is None:
+                    procurador_elem = elem
+        
+        if not tem_concessao:
+            return 0
         
         # Extrair número do processo
         numero_processo = processo.get('numero', '')
@@ -132,38 +218,26 @@ class ProcessadorINPI:
         # Extrair data de concessão
         data_concessao = processo.get('data-concessao', processo.get('data_concessao', ''))
         
-        # Extrair titular
+        # Extrair titular (o primeiro)
         titular = None
-        titulares = processo.findall('.//titular')
-        if titulares:
-            # Pegar o primeiro titular
-            titular_elem = titulares[0]
+        if titular_elem is not None:
             titular = titular_elem.get('nome-razao-social', '')
             if not titular:
                 titular = titular_elem.text
         
         # Extrair marca
-        marca = None
-        marca_elem = processo.find('.//marca/nome')
-        if marca_elem is not None:
-            marca = marca_elem.text
-        else:
-            # Tentar buscar direto no elemento marca
-            marca_elem = processo.find('.//marca')
-            if marca_elem is not None:
-                nome_elem = marca_elem.find('nome')
-                if nome_elem is not None:
-                    marca = nome_elem.text
+        marca = marca_elem.text if marca_elem is not None else None
         
         # Extrair procurador (opcional)
-        procurador = None
-        procurador_elem = processo.find('.//procurador')
-        if procurador_elem is not None:
-            procurador = procurador_elem.text
+        procurador = procurador_elem.text if procurador_elem is not None else None
         
-        # Processar classes Nice - apenas as que foram deferidas
-        classes_nice = processo.findall('.//classe-nice')
+        # Valores comuns a todas as linhas do processo
+        marca = marca if marca else 'N/A'
+        titular = titular if titular else 'N/A'
+        procurador = procurador if procurador else ''
+        data_concessao = data_concessao if data_concessao else ''
         
+        # Processar classes Nice - apenas as que foram deferidas
         for classe_nice in classes_nice:
             status_classe = classe_nice.find('status')
             if status_classe is not None and status_classe.text:
@@ -185,36 +259,31 @@ class ProcessadorINPI:
                     if trad_elem is not None:
                         traducao = trad_elem.text
                     
-                    processo_dict = {
-                        'numero_processo': numero_processo,
-                        'marca': marca if marca else 'N/A',
-                        'classe': codigo_classe if codigo_classe else 'N/A',
-                        'titular': titular if titular else 'N/A',
-                        'procurador': procurador if procurador else '',
-                        'data_concessao': data_concessao if data_concessao else '',
-                        'status_classe': status_classe.text if status_classe.text else 'Deferido',
-                        'especificacao': especificacao if especificacao else '',
-                        'traducao_especificacao': traducao if traducao else ''
-                    }
-                    
-                    processos_classe.append(processo_dict)
+                    self._acrescentar_linha(
+                        colunas, numero_processo, marca,
+                        codigo_classe if codigo_classe else 'N/A',
+                        titular, procurador, data_concessao,
+                        status_classe.text if status_classe.text else 'Deferido',
+                        especificacao if especificacao else '',
+                        traducao if traducao else ''
+                    )
+                    linhas += 1
         
         # Se não encontrou classes deferidas, mas o processo foi concedido, criar entrada sem classe
-        if not processos_classe and numero_processo:
-            processo_dict = {
-                'numero_processo': numero_processo,
-                'marca': marca if marca else 'N/A',
-                'classe': 'N/A',
-                'titular': titular if titular else 'N/A',
-                'procurador': procurador if procurador else '',
-                'data_concessao': data_concessao if data_concessao else '',
-                'status_classe': 'Concedido',
-                'especificacao': '',
-                'traducao_especificacao': ''
-            }
-            processos_classe.append(processo_dict)
-        
-        return processos_classe
+        if not linhas and numero_processo:
+            self._acrescentar_linha(
+                colunas, numero_processo, marca, 'N/A', titular, procurador,
+                data_concessao, 'Concedido', '', ''
+            )
+            linhas += 1
+        
+        return linhas
+    
+    @staticmethod
+    def _acrescentar_linha(colunas: Dict[str, List], *valores):
+        """Acrescenta uma linha nas listas de colunas (valores na ordem de CAMPOS_PROCESSO)"""
+        for campo, valor in zip(ProcessadorINPI.CAMPOS_PROCESSO, valores):
+            colunas[campo].append(valor)
     
     def processar_csv(self, caminho_arquivo, separador=';', encoding='utf-8') -> pd.DataFrame:
         """
@@ -231,10 +300,15 @@ class ProcessadorINPI:
         try:
             # Tentar diferentes encodings
             encodings = [encoding, 'latin-1', 'iso-8859-1', 'cp1252']
+            # Testar os encodings numa amostra do início: o arquivo inteiro é lido primeiro com o que passou
+            encoding_amostra = self._detectar_encoding(caminho_arquivo, encodings)
+            if encoding_amostra:
+                encodings = [encoding_amostra] + [enc for enc in encodings if enc != encoding_amostra]
             df = None
             
             for enc in encodings:
                 try:
+                    self._voltar_ao_inicio(caminho_arquivo)
                     df = pd.read_csv(caminho_arquivo, sep=separador, encoding=enc, on_bad_lines='skip', low_memory=False)
                     break
                 except UnicodeDecodeError:
@@ -244,7 +318,7 @@ class ProcessadorINPI:
                 raise Exception("Não foi possível ler o arquivo CSV com os encodings testados")
             
             # Identificar coluna de status
-            coluna_status = self._encontrar_coluna(df, ['situacao', 'status', 'situacao_processo', 'estado'])
+            coluna_status = self._encontrar_coluna(df, self.NOMES_COLUNA_STATUS)
             
             if coluna_status:
                 # Filtrar concedidos
@@ -261,6 +335,43 @@ class ProcessadorINPI:
         except Exception as e:
             raise Exception(f"Erro ao processar CSV: {str(e)}")
     
+    @staticmethod
+    def _detectar_encoding(caminho_arquivo, encodings: List[str], tamanho_amostra: int = 65536) -> Optional[str]:
+        """
+        Retorna o primeiro encoding que decodifica os primeiros bytes do arquivo
+        
+        Args:
+            caminho_arquivo: Caminho ou objeto file do arquivo
+            encodings: Encodings candidatos, em ordem de preferência
+            tamanho_amostra: Quantidade de bytes lidos do início (padrão: 64 KB)
+            
+        Returns:
+            Encoding escolhido ou None se nenhum decodificar a amostra
+        """
+        if hasattr(caminho_arquivo, 'read'):
+            amostra = caminho_arquivo.read(tamanho_amostra)
+            caminho_arquivo.seek(0)
+        else:
+            with open(caminho_arquivo, 'rb') as f:
+                amostra = f.read(tamanho_amostra)
+        if isinstance(amostra, str):
+            return None
+        
+        for enc in encodings:
+            try:
+                # final=False: um caractere multibyte cortado no fim da amostra não conta como erro
+                codecs.getincrementaldecoder(enc)().decode(amostra, final=False)
+                return enc
+            except (UnicodeDecodeError, LookupError):
+                continue
+        return None
+    
+    @staticmethod
+    def _voltar_ao_inicio(arquivo):
+        """Volta objetos file ao início para uma nova leitura (caminhos são ignorados)"""
+        if hasattr(arquivo, 'seek'):
+            arquivo.seek(0)
+    
     def processar_excel(self, caminho_arquivo, planilha=0) -> pd.DataFrame:
         """
         Processa arquivo Excel da Revista do INPI
@@ -273,10 +384,17 @@ class ProcessadorINPI:
             DataFrame com processos concedidos
         """
         try:
-            df = pd.read_excel(caminho_arquivo, sheet_name=planilha, engine='openpyxl')
+            try:
+                df = pd.read_excel(caminho_arquivo, sheet_name=planilha, engine=_ENGINE_EXCEL)
+            except Exception:
+                if _ENGINE_EXCEL == 'openpyxl':
+                    raise
+                # Arquivo que o calamine não abre: tenta de novo com o openpyxl
+                self._voltar_ao_inicio(caminho_arquivo)
+                df = pd.read_excel(caminho_arquivo, sheet_name=planilha, engine='openpyxl')
             
             # Identificar coluna de status
-            coluna_status = self._encontrar_coluna(df, ['situacao', 'status', 'situacao_processo', 'estado'])
+            coluna_status = self._encontrar_coluna(df, self.NOMES_COLUNA_STATUS)
             
             if coluna_status:
                 # Filtrar concedidos
@@ -293,16 +411,32 @@ class ProcessadorINPI:
         except Exception as e:
             raise Exception(f"Erro ao processar Excel: {str(e)}")
     
-    def _encontrar_coluna(self, df: pd.DataFrame, possiveis_nomes: List[str]) -> Optional[str]:
+    def _encontrar_coluna(self, df: pd.DataFrame, possiveis_nomes: Sequence[str]) -> Optional[str]:
         """
         Encontra uma coluna no DataFrame baseado em possíveis nomes
         """
-        colunas_lower = [col.lower() for col in df.columns]
+        return self.encontrar_nome_coluna(df.columns, possiveis_nomes)
+    
+    @staticmethod
+    def encontrar_nome_coluna(colunas: Sequence, possiveis_nomes: Sequence[str]) -> Optional[str]:
+        """
+        Encontra, entre os nomes de colunas dados, o primeiro que contém um dos possíveis nomes
+        
+        Args:
+            colunas: Nomes das colunas (ex.: df.columns)
+            possiveis_nomes: Nomes procurados, em ordem de prioridade
+            
+        Returns:
+            Nome da coluna encontrada ou None
+        """
+        # Cada nome de coluna é convertido para minúsculas uma única vez (e não uma vez por nome procurado)
+        colunas_lower = [(str(col).lower(), col) for col in colunas]
         
         for nome in possiveis_nomes:
-            for idx, col_lower in enumerate(colunas_lower):
-                if nome.lower() in col_lower:
-                    return df.columns[idx]
+            nome_lower = nome.lower()
+            for col_lower, col in colunas_lower:
+                if nome_lower in col_lower:
+                    return col
         
         return None
     
@@ -313,13 +447,13 @@ class ProcessadorINPI:
         if pd.isna(valor):
             return None
         valor_str = str(valor).strip()
-        if valor_str.lower() in ['n/a', 'nan', 'none', '']:
+        if valor_str.lower() in _VALORES_CLASSE_INVALIDOS:
             return None
         if valor_str.isdigit():
             return str(int(valor_str))
-        match = re.search(r'\d+', valor_str)
+        match = _PADRAO_NUMERO_CLASSE.search(valor_str)
         if match:
-            num = int(match.group())
+            num = int(match.group(1))
             if 1 <= num <= 45:
                 return str(num)
         return valor_str
@@ -331,29 +465,45 @@ class ProcessadorINPI:
         Ex: "03" -> "3", "08" -> "8"
         """
         df = df.copy()
-        
-        def extrair_classe(valor):
-            if pd.isna(valor):
-                return None
-            valor_str = str(valor).strip()
-            # Ignorar valores inválidos
-            if valor_str.lower() in ['n/a', 'nan', 'none', '']:
-                return None
-            # Se for apenas dígitos, remover zeros à esquerda
-            if valor_str.isdigit():
-                return str(int(valor_str))  # Remove zeros à esquerda: "03" -> "3", "08" -> "8"
-            # Extrair número da classe (ex: "Classe 5" -> "5", "Cl. 42" -> "42")
-            match = re.search(r'\d+', valor_str)
-            if match:
-                num = int(match.group())
-                if 1 <= num <= 45:
-                    return str(num)  # Sem zeros à esquerda
-            return valor_str
-        
-        df[coluna_classe] = df[coluna_classe].apply(extrair_classe)
+        df[coluna_classe] = self._normalizar_serie_classes(df[coluna_classe])
         
         return df
     
+    @staticmethod
+    def _normalizar_serie_classes(serie: pd.Series) -> pd.Series:
+        """
+        Versão vetorizada de normalizar_classe_unica para uma coluna inteira (operações .str, sem apply)
+        
+        Se a Series for categórica, normaliza só as categorias e devolve outra categórica
+        
+        Returns:
+            Series com a classe normalizada (str) ou None/NaN para valores inválidos
+        """
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            categorias = ProcessadorINPI._normalizar_serie_classes(pd.Series(serie.cat.categories, dtype=object))
+            # Categorias que normalizam para o mesmo valor ("03" e "3") são unidas; inválidas viram -1
+            codigos_categoria, novas_categorias = pd.factorize(categorias)
+            # Código -1 (valor ausente) aponta para o -1 acrescentado no final
+            codigos_categoria = np.append(codigos_categoria, -1)
+            codigos = codigos_categoria[serie.cat.codes.to_numpy()]
+            return pd.Series(
+                pd.Categorical.from_codes(codigos, categories=novas_categorias),
+                index=serie.index, name=serie.name
+            )
+        
+        texto = serie.astype('string').str.strip()
+        invalido = texto.isna() | texto.str.lower().isin(_VALORES_CLASSE_INVALIDOS)
+        
+        # Primeiro número do texto (ex: "03" -> 3, "Classe 5" -> 5, "Cl. 42" -> 42)
+        numero = pd.to_numeric(texto.str.extract(_PADRAO_NUMERO_CLASSE, expand=False), errors='coerce')
+        numero_str = numero.astype('Int64').astype('string')
+        
+        # Só dígitos: remove zeros à esquerda; texto com número: só aceita classes 1-45; senão mantém o texto
+        usar_numero = texto.str.isdigit().fillna(False) | numero.between(1, 45)
+        normalizada = numero_str.where(usar_numero, texto)
+        
+        return normalizada.astype(object).where(~invalido, None)
+    
     def agrupar_por_classe(self, df: pd.DataFrame, coluna_classe: str) -> Dict[str, pd.DataFrame]:
         """
         Agrupa processos por classe
@@ -361,19 +511,16 @@ class ProcessadorINPI:
         Returns:
             Dicionário com classe como chave e DataFrame como valor
         """
-        grupos = {}
-        
-        for classe in df[coluna_classe].unique():
-            if pd.notna(classe):
-                grupos[str(classe)] = df[df[coluna_classe] == classe].copy()
-        
-        return grupos
+        return {
+            str(classe): grupo.copy()
+            for classe, grupo in df.groupby(coluna_classe, observed=True, sort=False)
+        }
     
     def obter_estatisticas_classe(self, df: pd.DataFrame, coluna_classe: str) -> pd.DataFrame:
         """
         Retorna estatísticas por classe
         """
-        stats = df.groupby(coluna_classe).agg({
+        stats = df.groupby(coluna_classe, observed=True).agg({
             coluna_classe: 'count'
         }).rename(columns={coluna_classe: 'quantidade'}).sort_index()
         
@@ -397,7 +544,44 @@ class ProcessadorINPI:
         if df.empty:
             return df
         
-        # Normalizar classes desejadas (remover zeros à esquerda e converter para string)
+        classes_normalizadas = self._normalizar_classes_desejadas(tuple(classes_desejadas))
+        if not classes_normalizadas:
+            return df
+        
+        # Normalizar valores da coluna de classe e filtrar (sem coluna temporária)
+        mask = self._mascara_classes(df[coluna_classe], classes_normalizadas)
+        return df.loc[mask]
+    
+    @classmethod
+    def _mascara_classes(cls, serie: pd.Series, classes_normalizadas: FrozenSet[str]) -> np.ndarray:
+        """
+        Marca as linhas cuja classe normalizada está entre as classes desejadas
+        
+        Em coluna categórica a decisão é tomada uma vez por categoria e aplicada pelos códigos inteiros,
+        sem comparar strings linha a linha.
+        
+        Returns:
+            Array booleano na ordem das linhas
+        """
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            categorias = cls._normalizar_serie_classes(pd.Series(serie.cat.categories, dtype=object))
+            # Código -1 (valor ausente) aponta para o False acrescentado no final
+            selecionadas = np.append(categorias.isin(classes_normalizadas).to_numpy(), False)
+            return selecionadas[serie.cat.codes.to_numpy()]
+        return cls._normalizar_serie_classes(serie).isin(classes_normalizadas).to_numpy()
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _normalizar_classes_desejadas(classes_desejadas: Tuple[str, ...]) -> FrozenSet[str]:
+        """
+        Normaliza as classes escolhidas pelo usuário (mesma regra aplicada à coluna de classe)
+        
+        O resultado fica em cache: a mesma seleção (ex: CLASSES_PADRAO) é normalizada uma vez só.
+        
+        Returns:
+            Conjunto de classes normalizadas (str); vazio se nenhuma for válida
+        """
+        # Remover zeros à esquerda e converter para string
         classes_normalizadas = []
         for c in classes_desejadas:
             if c and str(c).strip():
@@ -407,50 +591,15 @@ class ProcessadorINPI:
                     classes_normalizadas.append(str(int(c_str)))
                 else:
                     # Tentar extrair número de strings como "Classe 5" ou "Cl. 42"
-                    match = re.search(r'\d+', c_str)
+                    match = _PADRAO_NUMERO_CLASSE.search(c_str)
                     if match:
-                        num = int(match.group())
+                        num = int(match.group(1))
                         if 1 <= num <= 45:
                             classes_normalizadas.append(str(num))
                     else:
                         classes_normalizadas.append(c_str)
         
-        if not classes_normalizadas:
-            return df
-        
-        # Normalizar valores da coluna de classe no DataFrame
-        df_filtrado = df.copy()
-        
-        def normalizar_valor_classe(valor):
-            """Normaliza um valor de classe para comparação"""
-            if pd.isna(valor):
-                return None
-            valor_str = str(valor).strip()
-            # Ignorar valores como "N/A", "nan", etc.
-            if valor_str.lower() in ['n/a', 'nan', 'none', '']:
-                return None
-            # Tentar extrair número
-            if valor_str.isdigit():
-                return str(int(valor_str))
-            # Tentar extrair número de strings como "Classe 5"
-            match = re.search(r'\d+', valor_str)
-            if match:
-                num = int(match.group())
-                if 1 <= num <= 45:
-                    return str(num)
-            return valor_str
-        
-        df_filtrado[coluna_classe + '_normalizada'] = df_filtrado[coluna_classe].apply(normalizar_valor_classe)
-        
-        # Filtrar usando a coluna normalizada
-        mask = df_filtrado[coluna_classe + '_normalizada'].isin(classes_normalizadas)
-        df_resultado = df_filtrado[mask].copy()
-        
-        # Remover coluna temporária
-        if coluna_classe + '_normalizada' in df_resultado.columns:
-            df_resultado = df_resultado.drop(columns=[coluna_classe + '_normalizada'])
-        
-        return df_resultado
+        return frozenset(classes_normalizadas)
     
     def filtrar_por_palavras_chave(self, df: pd.DataFrame, palavras_chave: List[str], coluna_especificacao: str = 'especificacao') -> pd.DataFrame:
         """
@@ -476,25 +625,76 @@ class ProcessadorINPI:
         if not palavras_lower:
             return df
         
-        # Criar padrão regex (qualquer uma das palavras)
-        # Usar word boundaries para busca mais precisa
-        padrao = '|'.join([re.escape(p) for p in palavras_lower])
+        # Buscar sem copiar o DataFrame
+        mask = self._mascara_palavras_chave(df[coluna_especificacao], tuple(palavras_lower))
         
-        # Filtrar - tratar valores NaN e vazios
-        df_filtrado = df.copy()
+        return df.loc[mask]
+    
+    def _mascara_palavras_chave(self, serie: pd.Series, palavras_lower: Tuple[str, ...]) -> pd.Series:
+        """
+        Marca as linhas cujo texto contém alguma das palavras-chave (case insensitive; NaN não casa)
         
-        # Preencher NaN com string vazia para evitar erros
-        df_filtrado[coluna_especificacao] = df_filtrado[coluna_especificacao].fillna('')
+        Com pyahocorasick instalado cada texto é percorrido uma única vez, qualquer que seja o número
+        de palavras; sem ele usa a regex compilada com as palavras em alternação.
         
-        # Converter para string e buscar (case insensitive)
-        mask = df_filtrado[coluna_especificacao].astype(str).str.lower().str.contains(
-            padrao,
-            case=False,
-            na=False,
-            regex=True
+        Args:
+            serie: Coluna de texto (especificação)
+            palavras_lower: Palavras-chave já em minúsculas
+            
+        Returns:
+            Series booleana com o mesmo índice da coluna
+        """
+        preenchido = serie.notna()
+        
+        if ahocorasick is None:
+            padrao = self._compilar_padrao_palavras(palavras_lower)
+            return serie.astype(str).str.contains(padrao, na=False, regex=True) & preenchido
+        
+        automato = self._obter_automato_palavras(palavras_lower)
+        textos = serie[preenchido].astype(str).str.lower()
+        encontrados = np.fromiter(
+            (next(automato.iter(texto), None) is not None for texto in textos),
+            dtype=bool,
+            count=len(textos)
         )
+        mask = np.zeros(len(serie), dtype=bool)
+        mask[preenchido.to_numpy()] = encontrados
+        return pd.Series(mask, index=serie.index)
+    
+    def _obter_automato_palavras(self, palavras_lower: Tuple[str, ...]):
+        """
+        Retorna o autômato Aho-Corasick das palavras-chave, montado uma vez por conjunto de palavras
+        
+        Args:
+            palavras_lower: Palavras-chave já em minúsculas
+            
+        Returns:
+            ahocorasick.Automaton pronto para busca
+        """
+        automato = self._automatos_palavras.get(palavras_lower)
+        if automato is None:
+            automato = ahocorasick.Automaton()
+            for palavra in palavras_lower:
+                automato.add_word(palavra, palavra)
+            automato.make_automaton()
+            self._automatos_palavras[palavras_lower] = automato
+        return automato
+    
+    def _compilar_padrao_palavras(self, palavras_lower: Tuple[str, ...]) -> re.Pattern:
+        """
+        Retorna a regex compilada (case insensitive) que casa qualquer uma das palavras-chave
         
-        return df_filtrado[mask]
+        Args:
+            palavras_lower: Palavras-chave já em minúsculas
+            
+        Returns:
+            Padrão compilado, reaproveitado nas chamadas seguintes com as mesmas palavras
+        """
+        padrao = self._padroes_palavras.get(palavras_lower)
+        if padrao is None:
+            padrao = re.compile('|'.join(re.escape(p) for p in palavras_lower), re.IGNORECASE)
+            self._padroes_palavras[palavras_lower] = padrao
+        return padrao
     
     def filtrar_processos(self, df: pd.DataFrame, classes_desejadas: List[str] = None, 
                          palavras_chave: List[str] = None, 
@@ -516,18 +716,24 @@ class ProcessadorINPI:
         if df.empty:
             return df
         
-        df_filtrado = df.copy()
+        # Uma única máscara para os dois filtros; o DataFrame é recortado uma vez só, no final
+        mask = np.ones(len(df), dtype=bool)
         
         # Filtrar por classes (apenas se a lista não estiver vazia)
-        if classes_desejadas and len(classes_desejadas) > 0:
-            df_filtrado = self.filtrar_por_classes(df_filtrado, classes_desejadas, coluna_classe)
-            # Se após filtrar por classes não sobrou nada, retornar vazio
-            if df_filtrado.empty:
-                return df_filtrado
+        if classes_desejadas and len(classes_desejadas) > 0 and coluna_classe in df.columns:
+            classes_normalizadas = self._normalizar_classes_desejadas(tuple(classes_desejadas))
+            if classes_normalizadas:
+                mask &= self._mascara_classes(df[coluna_classe], classes_normalizadas)
+                # Se após filtrar por classes não sobrou nada, retornar vazio
+                if not mask.any():
+                    return df.loc[mask]
         
         # Filtrar por palavras-chave (apenas se a lista não estiver vazia)
-        if palavras_chave and len(palavras_chave) > 0:
-            df_filtrado = self.filtrar_por_palavras_chave(df_filtrado, palavras_chave, coluna_especificacao)
+        if palavras_chave and len(palavras_chave) > 0 and coluna_especificacao in df.columns:
+            palavras_lower = [p.lower().strip() for p in palavras_chave if p and str(p).strip()]
+            if palavras_lower:
+                # Só as linhas que passaram pelo filtro de classes são examinadas
+                mask[mask] = self._mascara_palavras_chave(df[coluna_especificacao][mask], tuple(palavras_lower)).to_numpy()
         
-        return df_filtrado
+        return df.loc[mask]
 
@@ -2,235 +2,328 @@
 Módulo de Interface do Usuário (UI)
 Contém toda a lógica de apresentação e interação com o usuário
 """
+import itertools
+import math
+import time
 import streamlit as st
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
 from io import BytesIO
 from processador_inpi import ProcessadorINPI
-from database_supabase import DatabaseSupabase
+from database_supabase import (
+    DatabaseSupabase,
+    buscar_processos_pagina_cache,
+    listar_revistas_cache,
+    listar_revistas_registradas_cache,
+)
 from gerenciador_revistas import GerenciadorRevistas
 
 
+# Páginas como fragmentos: interações dentro de uma página reexecutam só a página, sem refazer
+# CSS, navegação e verificação de sessão (st.fragment; sem efeito em versões que não o têm)
+_fragmento = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda funcao: funcao)
+
+# Classes Nice (1-45) oferecidas nos seletores de classe
+_OPCOES_CLASSES = tuple(str(i) for i in range(1, 46))
+
+# Colunas de dados_marcas exibidas ou usadas pela aba Consultar (status, oculto na tela, fica de fora)
+_COLUNAS_CONSULTAR = ('processo', 'classe', 'marca', 'empresa', 'n_revista', 'especificacao', 'verificacao')
+
+# Registros trazidos por vez na aba Consultar ("Carregar mais" busca a página seguinte)
+TAMANHO_PAGINA_CONSULTAR = 5000
+
+
+# Estilos da aplicação (constante: montada uma vez na importação do módulo)
+_CSS_CUSTOMIZADO = """
+<style>
+/* Sidebar branco */
+[data-testid="stSidebar"] {
+    background-color: #FFFFFF !important;
+}
+
+/* Fundo das páginas PRETO */
+.stApp, section[data-testid="stMain"], .main .block-container, 
+.main .element-container, .main div, .main section {
+    background-color: #000000 !important;
+}
+
+/* TODOS OS TEXTOS EM BRANCO */
+.main *, section[data-testid="stMain"] * {
+    color: #FFFFFF !important;
+}
+
+/* Inputs com fundo escuro e texto branco */
+.main input, .main textarea, .main select {
+    background-color: #1a1a1a !important;
+    color: #FFFFFF !important;
+    border: 1px solid #333333 !important;
+}
+
+/* Dataframes com fundo escuro */
+.main table, .main .stDataFrame, .main .stDataFrame *,
+.main [data-testid="stDataFrame"], .main [data-testid="stDataFrame"] * {
+    background-color: #1a1a1a !important;
+    color: #FFFFFF !important;
+}
+
+/* Sidebar texto preto */
+[data-testid="stSidebar"] * {
+    color: #1f1f1f !important;
+}
+
+/* Botões de navegação na sidebar - PRIMARY (ativo) - AZUL */
+[data-testid="stSidebar"] button[kind="primary"],
+[data-testid="stSidebar"] button[data-baseweb="button"][kind="primary"],
+[data-testid="stSidebar"] button.stButton[kind="primary"],
+[data-testid="stSidebar"] .stButton button[kind="primary"] {
+    background-color: #0066cc !important;
+    color: #FFFFFF !important;
+    border: 2px solid #0066cc !important;
+}
+
+/* Botões de navegação na sidebar - SECONDARY (inativo) - PRETO/CINZA */
+[data-testid="stSidebar"] button[kind="secondary"],
+[data-testid="stSidebar"] button[data-baseweb="button"][kind="secondary"],
+[data-testid="stSidebar"] button.stButton[kind="secondary"],
+[data-testid="stSidebar"] .stButton button[kind="secondary"] {
+    background-color: #1f1f1f !important;
+    color: #FFFFFF !important;
+    border: 1px solid #333333 !important;
+}
+
+/* Garantir que botões da sidebar não herdem estilos da área principal */
+[data-testid="stSidebar"] button {
+    background-color: inherit !important;
+}
+
+/* Override para garantir que botões secondary não fiquem azuis */
+[data-testid="stSidebar"] button[kind="secondary"] * {
+    color: #FFFFFF !important;
+}
+
+/* Botões azuis com texto branco - APENAS na área principal (depois das regras da sidebar) */
+/* NÃO afetar botões do header */
+section[data-testid="stMain"] button:not([data-testid*="baseButton-header"]),
+section[data-testid="stMain"] button:not([data-testid*="baseButton-header"]) *,
+.main button:not([data-testid*="baseButton-header"]),
+.main button:not([data-testid*="baseButton-header"]) * {
+    background-color: #0066cc !important;
+    color: #FFFFFF !important;
+}
+
+/* Garantir que o botão do header (toggle sidebar) não seja afetado */
+[data-testid="stHeader"] button,
+[data-testid="stHeader"] button *,
+button[data-testid*="baseButton-header"],
+button[data-testid*="baseButton-header"] * {
+    background-color: transparent !important;
+    color: inherit !important;
+}
+</style>
+"""
+
+
+# Estilos da página de login (fundo branco, inputs/botões azuis e sem o botão de mostrar senha)
+_CSS_LOGIN = """
+<style>
+/* Fundo branco para a página de login */
+.stApp, section[data-testid="stMain"], .main .block-container, 
+.main .element-container, .main div, .main section {
+    background-color: #FFFFFF !important;
+}
+
+/* Textos em preto na página de login */
+.main *, section[data-testid="stMain"] * {
+    color: #1f1f1f !important;
+}
+
+/* Inputs com fundo branco, borda azul e texto azul */
+.main input[type="text"],
+.main input[type="password"],
+.main input[type="email"],
+.main textarea,
+.main select,
+section[data-testid="stMain"] input[type="text"],
+section[data-testid="stMain"] input[type="password"],
+section[data-testid="stMain"] input[type="email"],
+input[type="text"],
+input[type="password"],
+input[type="email"],
+input[data-baseweb="input"],
+div[data-testid="stTextInput"] input {
+    background-color: #FFFFFF !important;
+    color: #0066cc !important;
+    border: 2px solid #0066cc !important;
+    border-radius: 4px !important;
+}
+
+/* Labels dos inputs em azul */
+.main label,
+section[data-testid="stMain"] label,
+label[data-baseweb="label"],
+.stTextInput label,
+.stTextInput > div > label,
+div[data-testid="stTextInput"] label {
+    color: #0066cc !important;
+}
+
+/* Botões azuis */
+.main button,
+.main button *,
+section[data-testid="stMain"] button,
+button[data-baseweb="button"],
+button[data-baseweb="button"] *,
+.stButton > button,
+.stButton > button * {
+    background-color: #0066cc !important;
+    color: #FFFFFF !important;
+    border: 2px solid #0066cc !important;
+    border-radius: 4px !important;
+}
+
+/* Hover do botão */
+.main button:hover,
+section[data-testid="stMain"] button:hover,
+button[data-baseweb="button"]:hover {
+    background-color: #0052a3 !important;
+    border-color: #0052a3 !important;
+}
+
+/* Placeholder dos inputs em azul claro */
+.main input::placeholder,
+section[data-testid="stMain"] input::placeholder {
+    color: #66a3ff !important;
+    opacity: 0.7 !important;
+}
+
+/* Foco nos inputs - manter azul */
+.main input:focus,
+section[data-testid="stMain"] input:focus,
+input[data-baseweb="input"]:focus {
+    border-color: #0066cc !important;
+    box-shadow: 0 0 0 2px rgba(0, 102, 204, 0.2) !important;
+}
+
+/* Remover apenas o botão de mostrar/ocultar senha (e o seu container, sem afetar o input) */
+div[data-testid="stTextInput"] button[data-baseweb="button"],
+div[data-testid="stTextInput"] button[title*="Show"],
+div[data-testid="stTextInput"] button[title*="Hide"],
+div[data-testid="stTextInput"] button[aria-label*="password"],
+div[data-testid="stTextInput"] > div > div:last-child button,
+div[data-testid="stTextInput"] > div > div > div:last-child button {
+    display: none !important;
+    visibility: hidden !important;
+    width: 0 !important;
+    height: 0 !important;
+    padding: 0 !important;
+    margin: 0 !important;
+}
+div[data-testid="stTextInput"] > div > div:last-child:has(button):not(:has(input)),
+div[data-testid="stTextInput"] > div > div > div:last-child:has(button):not(:has(input)) {
+    display: none !important;
+}
+</style>
+"""
+
+
+def _injetar_css(css: str):
+    """Injeta um bloco <style> com st.html (sem o processamento de markdown); st.markdown em versões antigas"""
+    if hasattr(st, 'html'):
+        st.html(css)
+    else:
+        st.markdown(css, unsafe_allow_html=True)
+
+
+# Logo da aplicação (verificada uma vez na importação; None se o arquivo não existir)
+_LOGO_PATH = Path("revist.png") if Path("revist.png").exists() else None
+
+
+@st.cache_data(show_spinner=False)
+def _carregar_logo() -> bytes:
+    """Bytes da logo (lidos do disco na primeira vez; nas reexecuções vêm do cache)"""
+    return _LOGO_PATH.read_bytes()
+
+
 def aplicar_estilos_customizados():
     """Aplica estilos CSS customizados"""
-    st.markdown("""
-    <style>
-    /* Sidebar branco */
-    [data-testid="stSidebar"] {
-        background-color: #FFFFFF !important;
-    }
-    
-    /* Fundo das páginas PRETO */
-    .stApp, section[data-testid="stMain"], .main .block-container, 
-    .main .element-container, .main div, .main section {
-        background-color: #000000 !important;
-    }
-    
-    /* TODOS OS TEXTOS EM BRANCO */
-    .main *, section[data-testid="stMain"] * {
-        color: #FFFFFF !important;
-    }
-    
-    /* Inputs com fundo escuro e texto branco */
-    .main input, .main textarea, .main select {
-        background-color: #1a1a1a !important;
-        color: #FFFFFF !important;
-        border: 1px solid #333333 !important;
-    }
-    
-    /* Dataframes com fundo escuro */
-    .main table, .main .stDataFrame, .main .stDataFrame *,
-    .main [data-testid="stDataFrame"], .main [data-testid="stDataFrame"] * {
-        background-color: #1a1a1a !important;
-        color: #FFFFFF !important;
-    }
-    
-    /* Sidebar texto preto */
-    [data-testid="stSidebar"] * {
-        color: #1f1f1f !important;
-    }
-    
-    /* Botões de navegação na sidebar - PRIMARY (ativo) - AZUL */
-    [data-testid="stSidebar"] button[kind="primary"],
-    [data-testid="stSidebar"] button[data-baseweb="button"][kind="primary"],
-    [data-testid="stSidebar"] button.stButton[kind="primary"],
-    [data-testid="stSidebar"] .stButton button[kind="primary"] {
-        background-color: #0066cc !important;
-        color: #FFFFFF !important;
-        border: 2px solid #0066cc !important;
-    }
-    
-    /* Botões de navegação na sidebar - SECONDARY (inativo) - PRETO/CINZA */
-    [data-testid="stSidebar"] button[kind="secondary"],
-    [data-testid="stSidebar"] button[data-baseweb="button"][kind="secondary"],
-    [data-testid="stSidebar"] button.stButton[kind="secondary"],
-    [data-testid="stSidebar"] .stButton button[kind="secondary"] {
-        background-color: #1f1f1f !important;
-        color: #FFFFFF !important;
-        border: 1px solid #333333 !important;
-    }
-    
-    /* Garantir que botões da sidebar não herdem estilos da área principal */
-    [data-testid="stSidebar"] button {
-        background-color: inherit !important;
-    }
-    
-    /* Override para garantir que botões secondary não fiquem azuis */
-    [data-testid="stSidebar"] button[kind="secondary"] * {
-        color: #FFFFFF !important;
-    }
-    
-    /* Botões azuis com texto branco - APENAS na área principal (depois das regras da sidebar) */
-    /* NÃO afetar botões do header */
-    section[data-testid="stMain"] button:not([data-testid*="baseButton-header"]),
-    section[data-testid="stMain"] button:not([data-testid*="baseButton-header"]) *,
-    .main button:not([data-testid*="baseButton-header"]),
-    .main button:not([data-testid*="baseButton-header"]) * {
-        background-color: #0066cc !important;
-        color: #FFFFFF !important;
-    }
-    
-    /* Garantir que o botão do header (toggle sidebar) não seja afetado */
-    [data-testid="stHeader"] button,
-    [data-testid="stHeader"] button *,
-    button[data-testid*="baseButton-header"],
-    button[data-testid*="baseButton-header"] * {
-        background-color: transparent !important;
-        color: inherit !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    _injetar_css(_CSS_CUSTOMIZADO)
 
 
 def inicializar_session_state():
     """Inicializa variáveis do session state"""
-    if 'dados_processados' not in st.session_state:
-        st.session_state.dados_processados = None
-    if 'df_processos' not in st.session_state:
-        st.session_state.df_processos = None
-    if 'numero_revista' not in st.session_state:
-        st.session_state.numero_revista = None
-    if 'consultar_supabase' not in st.session_state:
-        st.session_state.consultar_supabase = False
-    if 'pagina_ativa' not in st.session_state:
-        st.session_state.pagina_ativa = "gerenciar"
-    if 'palavras_chave_personalizadas' not in st.session_state:
-        st.session_state.palavras_chave_personalizadas = []
+    # Montado a cada chamada para que a lista padrão não seja compartilhada entre sessões
+    valores_iniciais = {
+        'dados_processados': None,
+        'df_processos': None,
+        'numero_revista': None,
+        'consultar_supabase': False,
+        'pagina_ativa': "gerenciar",
+        'palavras_chave_personalizadas': set(),
+        'autenticado': False,
+    }
+    for chave, valor in valores_iniciais.items():
+        st.session_state.setdefault(chave, valor)
 
 
 def renderizar_navegacao():
     """Renderiza a navegação na sidebar"""
     with st.sidebar:
         # Logo no header
-        try:
-            st.image("revist.png", use_container_width=True)
-        except:
+        if _LOGO_PATH:
+            st.image(_carregar_logo(), use_container_width=True)
+        else:
             st.title("📋 Sistema INPI")
         
         st.markdown("---")
         
         st.markdown("**Navegação**")
         
-        if st.button("📚 Gerenciar Revistas", use_container_width=True, 
-                    type="primary" if st.session_state.pagina_ativa == "gerenciar" else "secondary",
-                    key="btn_gerenciar"):
-            st.session_state.pagina_ativa = "gerenciar"
-            st.rerun()
+        # A página é trocada no callback, antes da reexecução causada pelo clique (sem st.rerun extra)
+        st.button("📚 Gerenciar Revistas", use_container_width=True, 
+                  type="primary" if st.session_state.pagina_ativa == "gerenciar" else "secondary",
+                  key="btn_gerenciar", on_click=_ir_para_pagina, args=("gerenciar",))
         
-        if st.button("➕ Novas classes", use_container_width=True,
-                    type="primary" if st.session_state.pagina_ativa == "novas_classes" else "secondary",
-                    key="btn_novas_classes"):
-            st.session_state.pagina_ativa = "novas_classes"
-            st.rerun()
+        st.button("➕ Novas classes", use_container_width=True,
+                  type="primary" if st.session_state.pagina_ativa == "novas_classes" else "secondary",
+                  key="btn_novas_classes", on_click=_ir_para_pagina, args=("novas_classes",))
         
-        if st.button("🔍 Consultar Dados", use_container_width=True,
-                    type="primary" if st.session_state.pagina_ativa == "consultar" else "secondary",
-                    key="btn_consultar"):
-            st.session_state.pagina_ativa = "consultar"
-            st.rerun()
+        st.button("🔍 Consultar Dados", use_container_width=True,
+                  type="primary" if st.session_state.pagina_ativa == "consultar" else "secondary",
+                  key="btn_consultar", on_click=_ir_para_pagina, args=("consultar",))
+
+
+def _ir_para_pagina(pagina: str):
+    """Callback dos botões de navegação: define a página ativa"""
+    st.session_state.pagina_ativa = pagina
+
+
+def _obter_usuario_autenticado(db):
+    """
+    Usuário autenticado guardado em session_state (auth_user).
+    Só consulta o Supabase na primeira verificação ou quando o token está a menos de 60s de expirar.
+    """
+    usuario = st.session_state.get('auth_user')
+    if usuario:
+        exp = usuario.get('exp')
+        if exp is None or exp - 60 > time.time():
+            return usuario
+        usuario = db.renovar_sessao()
+    else:
+        usuario = db.obter_usuario_atual()
+    
+    if usuario:
+        st.session_state.auth_user = usuario
+    else:
+        st.session_state.pop('auth_user', None)
+    return usuario
 
 
 def renderizar_pagina_login(db):
     """Renderiza a página de login"""
     # Aplicar estilos customizados apenas para a página de login (fundo branco)
-    st.markdown("""
-    <style>
-    /* Fundo branco para a página de login */
-    .stApp, section[data-testid="stMain"], .main .block-container, 
-    .main .element-container, .main div, .main section {
-        background-color: #FFFFFF !important;
-    }
-    
-    /* Textos em preto na página de login */
-    .main *, section[data-testid="stMain"] * {
-        color: #1f1f1f !important;
-    }
-    
-    /* Inputs com borda azul e texto azul - seletores mais específicos */
-    .main input[type="text"],
-    .main input[type="password"],
-    .main input[type="email"],
-    .main textarea,
-    .main select,
-    section[data-testid="stMain"] input[type="text"],
-    section[data-testid="stMain"] input[type="password"],
-    section[data-testid="stMain"] input[type="email"],
-    input[data-baseweb="input"],
-    input[data-baseweb="input"] input {
-        background-color: #FFFFFF !important;
-        color: #0066cc !important;
-        border: 2px solid #0066cc !important;
-        border-radius: 4px !important;
-    }
-    
-    /* Labels dos inputs em azul - seletores mais específicos */
-    .main label,
-    section[data-testid="stMain"] label,
-    label[data-baseweb="label"],
-    .stTextInput label,
-    .stTextInput > div > label {
-        color: #0066cc !important;
-    }
-    
-    /* Botões azuis - seletores mais específicos */
-    .main button,
-    .main button *,
-    section[data-testid="stMain"] button,
-    button[data-baseweb="button"],
-    button[data-baseweb="button"] *,
-    .stButton > button,
-    .stButton > button * {
-        background-color: #0066cc !important;
-        color: #FFFFFF !important;
-        border: 2px solid #0066cc !important;
-        border-radius: 4px !important;
-    }
-    
-    /* Hover do botão */
-    .main button:hover,
-    section[data-testid="stMain"] button:hover,
-    button[data-baseweb="button"]:hover {
-        background-color: #0052a3 !important;
-        border-color: #0052a3 !important;
-    }
-    
-    /* Placeholder dos inputs em azul claro */
-    .main input::placeholder,
-    section[data-testid="stMain"] input::placeholder {
-        color: #66a3ff !important;
-        opacity: 0.7 !important;
-    }
-    
-    /* Foco nos inputs - manter azul */
-    .main input:focus,
-    section[data-testid="stMain"] input:focus,
-    input[data-baseweb="input"]:focus {
-        border-color: #0066cc !important;
-        box-shadow: 0 0 0 2px rgba(0, 102, 204, 0.2) !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    _injetar_css(_CSS_LOGIN)
     
     # Centralizar o formulário de login
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -239,10 +332,10 @@ def renderizar_pagina_login(db):
         st.markdown("<br>", unsafe_allow_html=True)
         
         # Logo no lugar do título - tamanho reduzido
-        try:
+        if _LOGO_PATH:
             # Usar width para controlar o tamanho da logo
-            st.image("revist.png", width=200)
-        except:
+            st.image(_carregar_logo(), width=200)
+        else:
             st.title("Login")
         
         st.markdown("---")
@@ -252,65 +345,16 @@ def renderizar_pagina_login(db):
             return
         
         # Verificar se já está autenticado
-        if db.verificar_sessao():
-            usuario = db.obter_usuario_atual()
-            if usuario:
-                st.success(f"✅ Você já está autenticado como: {usuario.get('email', 'Usuário')}")
-                if st.button("🔄 Continuar", use_container_width=True, type="primary"):
-                    st.session_state.autenticado = True
-                    st.rerun()
+        usuario = _obter_usuario_autenticado(db)
+        if usuario:
+            st.success(f"✅ Você já está autenticado como: {usuario.get('email', 'Usuário')}")
+            if st.button("🔄 Continuar", use_container_width=True, type="primary"):
+                st.session_state.autenticado = True
+                st.rerun()
             return
         
         # Formulário de login
         with st.form("form_login"):
-            # Usar st.markdown para aplicar estilos inline nos labels e remover botão de visibilidade da senha
-            st.markdown("""
-            <style>
-            div[data-testid="stTextInput"] label,
-            div[data-testid="stTextInput"] > div > label {
-                color: #0066cc !important;
-            }
-            /* Inputs com fundo branco, borda azul e texto azul - TODOS os inputs */
-            div[data-testid="stTextInput"] input,
-            div[data-testid="stTextInput"] input[type="text"],
-            div[data-testid="stTextInput"] input[type="password"],
-            input[type="text"],
-            input[type="password"],
-            input[data-baseweb="input"] {
-                background-color: #FFFFFF !important;
-                border: 2px solid #0066cc !important;
-                color: #0066cc !important;
-            }
-            /* Garantir que o input de senha especificamente tenha fundo branco */
-            div[data-testid="stTextInput"]:has(input[type="password"]) input,
-            div[data-testid="stTextInput"]:has(input[type="password"]) input[type="password"] {
-                background-color: #FFFFFF !important;
-                border: 2px solid #0066cc !important;
-                color: #0066cc !important;
-            }
-            /* Remover apenas o botão de mostrar/ocultar senha - mais específico */
-            div[data-testid="stTextInput"] button[data-baseweb="button"],
-            div[data-testid="stTextInput"] button[title*="Show"],
-            div[data-testid="stTextInput"] button[title*="Hide"],
-            div[data-testid="stTextInput"] button[aria-label*="password"],
-            div[data-testid="stTextInput"] > div > div:last-child button,
-            div[data-testid="stTextInput"] > div > div > div:last-child button {
-                display: none !important;
-                visibility: hidden !important;
-                opacity: 0 !important;
-                width: 0 !important;
-                height: 0 !important;
-                padding: 0 !important;
-                margin: 0 !important;
-            }
-            /* Remover o container do botão, mas NÃO afetar o input */
-            div[data-testid="stTextInput"] > div > div:last-child:has(button):not(:has(input)),
-            div[data-testid="stTextInput"] > div > div > div:last-child:has(button):not(:has(input)) {
-                display: none !important;
-            }
-            </style>
-            """, unsafe_allow_html=True)
-            
             email = st.text_input("📧 Email", placeholder="seu@email.com", key="input_email")
             senha = st.text_input("🔒 Senha", type="password", placeholder="Digite sua senha", key="input_senha")
             
@@ -326,6 +370,7 @@ def renderizar_pagina_login(db):
                         if resultado['sucesso']:
                             st.session_state.autenticado = True
                             st.session_state.usuario = resultado.get('usuario', {})
+                            st.session_state.auth_user = st.session_state.usuario
                             st.success(f"✅ Login realizado com sucesso!")
                             st.rerun()
                         else:
@@ -334,25 +379,22 @@ def renderizar_pagina_login(db):
 
 def renderizar_aplicacao(processador: ProcessadorINPI, db, init_supabase):
     """Função principal que renderiza toda a aplicação"""
-    # Inicializar session state
+    # Inicializar session state (inclui o estado de autenticação)
     inicializar_session_state()
     
-    # Verificar autenticação
-    if 'autenticado' not in st.session_state:
-        st.session_state.autenticado = False
+    # Token perto de expirar: renovar; se não for possível, voltar para o login
+    if st.session_state.autenticado and db is not None and 'auth_user' in st.session_state:
+        if not _obter_usuario_autenticado(db):
+            st.session_state.autenticado = False
     
     # Se não estiver autenticado, mostrar página de login
     if not st.session_state.autenticado:
         if db is not None:
             # Verificar se há sessão ativa no Supabase
-            if db.verificar_sessao():
-                usuario = db.obter_usuario_atual()
-                if usuario:
-                    st.session_state.autenticado = True
-                    st.session_state.usuario = usuario
-                else:
-                    renderizar_pagina_login(db)
-                    return
+            usuario = _obter_usuario_autenticado(db)
+            if usuario:
+                st.session_state.autenticado = True
+                st.session_state.usuario = usuario
             else:
                 renderizar_pagina_login(db)
                 return
@@ -381,12 +423,44 @@ def renderizar_aplicacao(processador: ProcessadorINPI, db, init_supabase):
         renderizar_aba_consultar_dados(processador, db, init_supabase)
 
 
+@st.cache_data(show_spinner=False)
+def _opcoes_palavras_chave(padrao: tuple, personalizadas: tuple):
+    """
+    Palavras-chave disponíveis (padrão + personalizadas), calculadas uma vez por combinação de listas
+    
+    Returns:
+        Tupla (lista ordenada sem vazias nem repetidas, conjunto das palavras em minúsculas)
+    """
+    todas_palavras = sorted(filter(None, set(padrao).union(personalizadas)))
+    return todas_palavras, frozenset(p.lower() for p in todas_palavras)
+
+
+@st.cache_data(show_spinner=False)
+def _classes_padrao_normalizadas(classes: tuple, padrao: tuple) -> list:
+    """
+    Classes selecionadas normalizadas para as opções do seletor ("03" -> "3"), calculadas uma vez por combinação
+    
+    Returns:
+        Lista das classes válidas, ou as classes padrão se nenhuma for válida
+    """
+    normalizadas = []
+    for c in classes:
+        # Converter "03" para "3", "08" para "8", etc.
+        c_normalizada = str(int(c)) if c.isdigit() else c
+        if c_normalizada in _OPCOES_CLASSES:
+            normalizadas.append(c_normalizada)
+    
+    # Se não encontrou nenhuma, usar o padrão do processador
+    return normalizadas or list(padrao)
+
+
 def definir_tipo_arquivo(arquivo):
     """Define o tipo do arquivo e retorna a extensão"""
     extensao = Path(arquivo.name).suffix.lower()
     return extensao
 
 
+@_fragmento
 def renderizar_aba_gerenciar_revistas(processador: ProcessadorINPI, db, init_supabase):
     """Renderiza a aba de Gerenciar Revistas"""
     st.header("📚 Gerenciamento de Revistas")
@@ -394,10 +468,8 @@ def renderizar_aba_gerenciar_revistas(processador: ProcessadorINPI, db, init_sup
     st.markdown("---")
     
     # Inicializar session state para filtros
-    if 'classes_desejadas' not in st.session_state:
-        st.session_state.classes_desejadas = processador.CLASSES_PADRAO.copy()
-    if 'palavras_chave' not in st.session_state:
-        st.session_state.palavras_chave = processador.PALAVRAS_CHAVE_PADRAO.copy()
+    st.session_state.setdefault('classes_desejadas', processador.CLASSES_PADRAO.copy())
+    st.session_state.setdefault('palavras_chave', processador.PALAVRAS_CHAVE_PADRAO.copy())
     
     if db is None:
         st.error("⚠️ Supabase não configurado. Configure SUPABASE_URL e SUPABASE_KEY no arquivo .env")
@@ -410,25 +482,15 @@ def renderizar_aba_gerenciar_revistas(processador: ProcessadorINPI, db, init_sup
         st.subheader("🎯 Filtros de Importação")
         st.markdown("Configure as classes e palavras-chave que serão aplicadas ao processar as revistas")
         
-        # Gerar opções de classes (1-45 como strings)
-        opcoes_classes = [str(i) for i in range(1, 46)]
-        
         # Garantir que os valores padrão estão nas opções (normalizar zeros à esquerda)
-        classes_padrao_normalizadas = []
-        for c in st.session_state.classes_desejadas:
-            # Converter "03" para "3", "08" para "8", etc.
-            c_normalizada = str(int(c)) if c.isdigit() else c
-            if c_normalizada in opcoes_classes:
-                classes_padrao_normalizadas.append(c_normalizada)
-        
-        # Se não encontrou nenhuma, usar o padrão do processador
-        if not classes_padrao_normalizadas:
-            classes_padrao_normalizadas = processador.CLASSES_PADRAO.copy()
+        classes_padrao_normalizadas = _classes_padrao_normalizadas(
+            tuple(st.session_state.classes_desejadas), tuple(processador.CLASSES_PADRAO)
+        )
         
         # Campo para selecionar classes
         classes_selecionadas = st.multiselect(
             "📋 Classes Desejadas:",
-            options=opcoes_classes,
+            options=_OPCOES_CLASSES,
             default=classes_padrao_normalizadas,
             help="Selecione as classes Nice que deseja importar"
         )
@@ -438,14 +500,13 @@ def renderizar_aba_gerenciar_revistas(processador: ProcessadorINPI, db, init_sup
         
         # Campo para palavras-chave - multiselect similar ao de classes
         # Obter todas as palavras-chave disponíveis (padrão + personalizadas)
-        todas_palavras = list(set(processador.PALAVRAS_CHAVE_PADRAO + st.session_state.palavras_chave_personalizadas))
-        todas_palavras = sorted([p for p in todas_palavras if p])  # Remover vazias e ordenar
+        todas_palavras, palavras_lower = _opcoes_palavras_chave(
+            tuple(processador.PALAVRAS_CHAVE_PADRAO), tuple(sorted(st.session_state.palavras_chave_personalizadas))
+        )
         
         # Determinar palavras padrão selecionadas
-        palavras_padrao_selecionadas = []
-        for p in st.session_state.palavras_chave:
-            if p in todas_palavras:
-                palavras_padrao_selecionadas.append(p)
+        disponiveis = set(todas_palavras)
+        palavras_padrao_selecionadas = [p for p in st.session_state.palavras_chave if p in disponiveis]
         
         # Se não houver selecionadas, usar padrão
         if not palavras_padrao_selecionadas:
@@ -476,10 +537,9 @@ def renderizar_aba_gerenciar_revistas(processador: ProcessadorINPI, db, init_sup
                 if nova_palavra and nova_palavra.strip():
                     palavra_limpa = nova_palavra.strip()
                     # Verificar se já existe (case insensitive)
-                    palavras_lower = [p.lower() for p in todas_palavras]
                     if palavra_limpa.lower() not in palavras_lower:
-                        # Adicionar à lista de personalizadas
-                        st.session_state.palavras_chave_personalizadas.append(palavra_limpa)
+                        # Adicionar ao conjunto de personalizadas
+                        st.session_state.palavras_chave_personalizadas.add(palavra_limpa)
                         # Adicionar às selecionadas
                         if palavra_limpa not in palavras_selecionadas:
                             palavras_selecionadas.append(palavra_limpa)
@@ -505,8 +565,8 @@ def renderizar_aba_gerenciar_revistas(processador: ProcessadorINPI, db, init_sup
         st.subheader("📥 Download e Processar Revistas")
         st.markdown("Baixe revistas do storage e processe automaticamente com os filtros configurados acima")
         
-        if st.button("🔄 Atualizar Lista", key="refresh_revistas"):
-            st.rerun()
+        # Limpa o cache no callback: o próprio clique já reexecuta a página com a lista nova
+        st.button("🔄 Atualizar Lista", key="refresh_revistas", on_click=GerenciadorRevistas.limpar_cache)
         
         revistas = gerenciador.listar_revistas_disponiveis()
         
@@ -528,16 +588,15 @@ def renderizar_aba_gerenciar_revistas(processador: ProcessadorINPI, db, init_sup
                         total_processos = 0
                         sucessos = 0
                         erros = []
+                        quadros = []
+                        revistas_com_dados = []
+                        numeros_revista = []
                         
                         with st.spinner(f"Processando {len(revistas_selecionadas)} revista(s)..."):
-                            for revista_selecionada in revistas_selecionadas:
-                                # Baixar revista
-                                arquivo_bytes = gerenciador.download_revista(revista_selecionada)
-                                if arquivo_bytes:
-                                    # Processar revista com filtros
-                                    arquivo_upload = BytesIO(arquivo_bytes)
-                                    arquivo_upload.name = revista_selecionada
-                                    
+                            # Downloads em paralelo (ou streaming, se for uma só); o processamento segue
+                            # um por vez aqui, na ordem selecionada, e o salvamento é feito uma vez no final
+                            for revista_selecionada, arquivo_upload in gerenciador.abrir_revistas(revistas_selecionadas):
+                                if arquivo_upload is not None:
                                     # Mostrar informações dos filtros configurados (apenas na primeira)
                                     if revista_selecionada == revistas_selecionadas[0]:
                                         classes_info = f"Classes: {', '.join(st.session_state.classes_desejadas) if st.session_state.classes_desejadas else 'Nenhuma'}"
@@ -545,47 +604,72 @@ def renderizar_aba_gerenciar_revistas(processador: ProcessadorINPI, db, init_sup
                                         st.info(f"🔧 Filtros configurados - {classes_info} | {palavras_info}")
                                     
                                     st.info(f"📄 Processando: {revista_selecionada}")
-                                    df = processar_arquivo_upload(arquivo_upload, processador, db)
+                                    # Processar revista com filtros; XML do storage vai direto ao processador
+                                    # (sem redetectar o tipo do arquivo em processar_arquivo_upload)
+                                    try:
+                                        if revista_selecionada.lower().endswith('.xml'):
+                                            df, st.session_state.numero_revista = _processar_bytes_xml_com_filtros(
+                                                arquivo_upload,
+                                                processador,
+                                                classes_desejadas=st.session_state.classes_desejadas,
+                                                palavras_chave=st.session_state.palavras_chave,
+                                                aplicar_palavras_chave=True,
+                                            )
+                                        else:
+                                            df = processar_arquivo_upload(arquivo_upload, processador, db)
+                                    except Exception as e:
+                                        erros.append(f"{revista_selecionada}: Erro ao processar - {str(e)}")
+                                        continue
+                                    finally:
+                                        arquivo_upload.close()
                                     
                                     if df is not None and not df.empty:
                                         total_processos += len(df)
-                                        
-                                        # Salvar no Supabase automaticamente
-                                        # Salvar número da revista na tabela revista (opcional - não bloqueia se falhar)
+                                        # Guardar para salvar todas as revistas de uma vez (número da revista por linha)
+                                        quadros.append(df.assign(n_revista=st.session_state.numero_revista))
+                                        revistas_com_dados.append(revista_selecionada)
                                         if st.session_state.numero_revista:
-                                            try:
-                                                resultado_revista = db.salvar_numero_revista(st.session_state.numero_revista)
-                                                if not resultado_revista['sucesso']:
-                                                    erro_revista = resultado_revista.get('erro', 'Erro desconhecido')
-                                                    if 'row-level security' not in str(erro_revista).lower() and '42501' not in str(erro_revista):
-                                                        erros.append(f"{revista_selecionada} - Erro ao salvar número: {erro_revista}")
-                                            except Exception as e:
-                                                erros.append(f"{revista_selecionada} - Erro ao salvar número: {str(e)}")
-                                        
-                                        # Salvar processos
-                                        try:
-                                            resultado = db.salvar_processos(df, st.session_state.numero_revista)
-                                            
-                                            if resultado['sucesso'] and resultado['processos_salvos'] > 0:
-                                                sucessos += 1
-                                                st.success(f"✅ {revista_selecionada}: {resultado['processos_salvos']} processo(s) salvo(s)")
-                                            else:
-                                                erros.append(f"{revista_selecionada}: {resultado.get('erro', 'Nenhum processo salvo')}")
-                                        except Exception as e:
-                                            erros.append(f"{revista_selecionada}: Erro ao salvar - {str(e)}")
+                                            numeros_revista.append(st.session_state.numero_revista)
                                     else:
                                         erros.append(f"{revista_selecionada}: Nenhum processo encontrado após aplicar filtros")
                                 else:
                                     erros.append(f"{revista_selecionada}: Erro ao baixar arquivo")
+                            
+                            # Salvar no Supabase automaticamente
+                            # Salvar números das revistas na tabela revista (opcional - não bloqueia se falhar)
+                            if numeros_revista:
+                                try:
+                                    resultado_revista = db.salvar_numeros_revistas(numeros_revista)
+                                    if not resultado_revista['sucesso']:
+                                        erro_revista = resultado_revista.get('erro', 'Erro desconhecido')
+                                        if 'row-level security' not in str(erro_revista).lower() and '42501' not in str(erro_revista):
+                                            erros.append(f"Erro ao salvar números das revistas: {erro_revista}")
+                                except Exception as e:
+                                    erros.append(f"Erro ao salvar números das revistas: {str(e)}")
+                            
+                            # Salvar processos de todas as revistas em uma única chamada
+                            if quadros:
+                                try:
+                                    resultado = db.salvar_processos(pd.concat(quadros, ignore_index=True))
+                                    
+                                    if resultado['sucesso'] and resultado['processos_salvos'] > 0:
+                                        sucessos = len(revistas_com_dados)
+                                        st.success(f"✅ {', '.join(revistas_com_dados)}: {resultado['processos_salvos']} processo(s) salvo(s)")
+                                    else:
+                                        erros.append(f"{', '.join(revistas_com_dados)}: {resultado.get('erro', 'Nenhum processo salvo')}")
+                                except Exception as e:
+                                    erros.append(f"{', '.join(revistas_com_dados)}: Erro ao salvar - {str(e)}")
                         
-                        # Resumo final
+                        # Resumo final (um único elemento: sucesso e até 10 erros na mesma mensagem)
                         st.markdown("---")
+                        resumo = []
                         if sucessos > 0:
-                            st.success(f"✅ **{sucessos}** revista(s) processada(s) com sucesso! Total de **{total_processos}** processo(s).")
+                            resumo.append(f"✅ **{sucessos}** revista(s) processada(s) com sucesso! Total de **{total_processos}** processo(s).")
                         if erros:
-                            st.warning(f"⚠️ {len(erros)} erro(s) encontrado(s):")
-                            for erro in erros[:10]:  # Mostrar até 10 erros
-                                st.text(f"  - {erro}")
+                            resumo.append(f"⚠️ {len(erros)} erro(s) encontrado(s):")
+                            resumo.append("\n".join(f"- {erro}" for erro in erros[:10]))
+                        if resumo:
+                            (st.warning if erros else st.success)("\n\n".join(resumo))
                         
                         if sucessos > 0:
                             st.rerun()
@@ -611,6 +695,7 @@ def renderizar_aba_gerenciar_revistas(processador: ProcessadorINPI, db, init_sup
             st.info("Nenhuma revista encontrada no storage.")
 
 
+@_fragmento
 def renderizar_aba_novas_classes(processador: ProcessadorINPI, db, init_supabase):
     """Página dedicada: importar classes adicionais a partir do XML já no storage (sem carregar a aba Gerenciar)."""
     st.header("➕ Novas classes")
@@ -635,16 +720,22 @@ def _filtrar_registros_ausentes_no_banco(df: pd.DataFrame, processador: Processa
         return df
     if not pares_existentes:
         return df.copy()
-    manter = []
-    for idx, row in df.iterrows():
-        proc = str(row.get('numero_processo', '')).strip() if pd.notna(row.get('numero_processo')) else ''
-        cls = processador.normalizar_classe_unica(row.get('classe'))
-        if not proc or not cls:
-            continue
-        if (proc, cls) in pares_existentes:
+    # Colunas como arrays NumPy indexados por posição (sem iterrows); "x != x" detecta NaN
+    vazio = np.full(len(df), None, dtype=object)
+    processos = df['numero_processo'].to_numpy(dtype=object) if 'numero_processo' in df.columns else vazio
+    # Classes normalizadas de uma vez (vetorizado); inválidas viram None/NaN
+    classes = (
+        processador._normalizar_serie_classes(df['classe']).to_numpy(dtype=object)
+        if 'classe' in df.columns else vazio
+    )
+    manter = np.zeros(len(df), dtype=bool)
+    for i, (proc, cls) in enumerate(zip(processos, classes)):
+        if proc is None or proc is pd.NA or proc != proc or cls is None or cls != cls:
             continue
-        manter.append(idx)
-    return df.loc[manter].copy() if manter else pd.DataFrame(columns=df.columns)
+        proc = str(proc).strip()
+        if proc and cls and (proc, cls) not in pares_existentes:
+            manter[i] = True
+    return df[manter].copy()
 
 
 def _processar_bytes_xml_com_filtros(
@@ -662,16 +753,21 @@ def _processar_bytes_xml_com_filtros(
     df, numero_revista = processador.processar_xml(arquivo_upload)
     if df is None or df.empty:
         return None, numero_revista
-    coluna_classe = processador._encontrar_coluna(df, ['classe', 'classe_nice', 'class'])
+    coluna_classe = processador._encontrar_coluna(df, processador.NOMES_COLUNA_CLASSE)
     if coluna_classe:
         df = processador.normalizar_classes(df, coluna_classe)
     else:
         coluna_classe = 'classe'
-    coluna_espec = processador._encontrar_coluna(df, ['especificacao', 'especificação', 'specification'])
-    if not coluna_espec:
-        coluna_espec = 'especificacao'
     palavras = palavras_chave if aplicar_palavras_chave and palavras_chave else None
     classes_filtro = classes_desejadas if classes_desejadas else None
+    if not palavras and not classes_filtro:
+        # Sem filtros: nada a procurar nem filtrar (a normalização acima continua valendo para o salvamento)
+        return df, numero_revista
+    coluna_espec = None
+    if palavras:
+        coluna_espec = processador._encontrar_coluna(df, processador.NOMES_COLUNA_ESPECIFICACAO)
+    if not coluna_espec:
+        coluna_espec = 'especificacao'
     df = processador.filtrar_processos(
         df,
         classes_desejadas=classes_filtro,
@@ -698,7 +794,7 @@ def _renderizar_complemento_classes_revista(processador: ProcessadorINPI, db: Da
     # Só lista o storage (sem varrer dados_marcas nem cruzar com listar_revistas_disponiveis) — bem mais rápido.
     no_storage = [
         n
-        for n in db.listar_revistas()
+        for n in listar_revistas_cache(db)
         if n and str(n).strip().lower().endswith(".xml")
     ]
     opcoes_arquivo = sorted(set(no_storage), reverse=True)
@@ -713,8 +809,10 @@ def _renderizar_complemento_classes_revista(processador: ProcessadorINPI, db: Da
     c_rev, c_ref = st.columns([4, 1])
     with c_ref:
         st.markdown("<br>", unsafe_allow_html=True)
-        if st.button("🔄 Atualizar lista", key="complemento_refresh_storage", use_container_width=True):
-            st.rerun()
+        st.button(
+            "🔄 Atualizar lista", key="complemento_refresh_storage", use_container_width=True,
+            on_click=GerenciadorRevistas.limpar_cache
+        )
     with c_rev:
         st.caption(f"{len(opcoes_arquivo)} arquivo(s) .xml no bucket — selecione uma ou mais revistas:")
         arquivos_escolhidos = st.multiselect(
@@ -749,10 +847,9 @@ def _renderizar_complemento_classes_revista(processador: ProcessadorINPI, db: Da
             f"**{len(arquivos_escolhidos)}** revistas selecionadas — cada uma será processada em sequência; "
             "o número da revista vem do XML (ou do nome do arquivo)."
         )
-    opcoes_todas = [str(i) for i in range(1, 46)]
     classes_novas = st.multiselect(
         "Classes adicionais a importar agora (Nice 1–45):",
-        options=opcoes_todas,
+        options=_OPCOES_CLASSES,
         default=[],
         help="Somente estas classes serão extraídas do XML. Linhas já existentes (mesmo processo + classe + revista) serão ignoradas.",
         key="complemento_classes_novas",
@@ -766,10 +863,9 @@ def _renderizar_complemento_classes_revista(processador: ProcessadorINPI, db: Da
     palavras_para_complemento: list = []
     if aplicar_kw:
         st.markdown("**Palavras-chave neste complemento**")
-        todas_palavras_comp = list(
-            set(processador.PALAVRAS_CHAVE_PADRAO + st.session_state.get('palavras_chave_personalizadas', []))
+        todas_palavras_comp, lower_all = _opcoes_palavras_chave(
+            tuple(processador.PALAVRAS_CHAVE_PADRAO), tuple(sorted(st.session_state.get('palavras_chave_personalizadas', ())))
         )
-        todas_palavras_comp = sorted([p for p in todas_palavras_comp if p])
         palavras_para_complemento = st.multiselect(
             "Palavras a considerar na especificação:",
             options=todas_palavras_comp,
@@ -791,9 +887,8 @@ def _renderizar_complemento_classes_revista(processador: ProcessadorINPI, db: Da
             if st.button("➕ Adicionar", key="complemento_adicionar_palavra", use_container_width=True):
                 if nova_palavra_comp and nova_palavra_comp.strip():
                     limpa = nova_palavra_comp.strip()
-                    lower_all = [x.lower() for x in todas_palavras_comp]
                     if limpa.lower() not in lower_all:
-                        st.session_state.palavras_chave_personalizadas.append(limpa)
+                        st.session_state.palavras_chave_personalizadas.add(limpa)
                         st.success(f"✅ Palavra **{limpa}** adicionada!")
                         st.rerun()
                     else:
@@ -814,8 +909,8 @@ def _renderizar_complemento_classes_revista(processador: ProcessadorINPI, db: Da
         erros_lote: list = []
         avisos_mismatch: list = []
         with st.spinner(f"Processando {len(arquivos_escolhidos)} revista(s)..."):
-            for nome_arquivo in arquivos_escolhidos:
-                arquivo_bytes = gerenciador.download_revista(nome_arquivo)
+            # Revistas baixadas em paralelo; cada uma é processada assim que fica pronta, em ordem
+            for nome_arquivo, arquivo_bytes in gerenciador.baixar_revistas(arquivos_escolhidos):
                 if not arquivo_bytes:
                     erros_lote.append(f"{nome_arquivo}: não foi possível baixar do storage.")
                     continue
@@ -880,12 +975,36 @@ def _renderizar_complemento_classes_revista(processador: ProcessadorINPI, db: Da
             st.success(f"**Total:** {total_inseridos} novo(s) registro(s) em {len(arquivos_escolhidos)} arquivo(s) processado(s).")
         if erros_lote:
             st.warning(f"{len(erros_lote)} problema(s) no lote:")
-            for e in erros_lote[:15]:
-                st.text(f"  • {e}")
+            # Um único elemento para a lista (até 15 itens)
+            st.text("\n".join(f"  • {e}" for e in erros_lote[:15]))
             if len(erros_lote) > 15:
                 st.caption(f"... e mais {len(erros_lote) - 15}.")
 
 
+# Padronização de colunas de CSV/Excel: (termos procurados no nome da coluna, nome padronizado), em ordem de prioridade
+_REGRAS_COLUNAS = (
+    (('numero', 'processo'), 'numero_processo'),
+    (('marca',), 'marca'),
+    (('classe', 'nice'), 'classe'),
+    (('titular', 'requerente', 'proprietario'), 'titular'),
+    (('data', 'concessao'), 'data_concessao'),
+)
+
+
+@st.cache_data(show_spinner=False)
+def _mapa_padronizacao_colunas(colunas: tuple) -> dict:
+    """Mapa {coluna original: nome padronizado} para CSV/Excel, calculado uma vez por conjunto de colunas"""
+    mapeamento_colunas = {}
+    for col in colunas:
+        col_lower = str(col).lower()
+        # Primeira regra com algum termo contido no nome da coluna vence
+        for termos, nome_padrao in _REGRAS_COLUNAS:
+            if any(termo in col_lower for termo in termos):
+                mapeamento_colunas[col] = nome_padrao
+                break
+    return mapeamento_colunas
+
+
 def processar_arquivo_upload(arquivo_upload, processador: ProcessadorINPI, db):
     """Processa arquivo enviado pelo usuário"""
     extensao = definir_tipo_arquivo(arquivo_upload)
@@ -906,25 +1025,12 @@ def processar_arquivo_upload(arquivo_upload, processador: ProcessadorINPI, db):
             # Para arquivos XML, os dados já vêm padronizados do processador
             # Para CSV/Excel, padronizar nomes de colunas
             if extensao in ['.csv', '.xlsx']:
-                # Padronizar nomes de colunas
-                mapeamento_colunas = {}
-                for col in df.columns:
-                    col_lower = col.lower()
-                    if 'numero' in col_lower or 'processo' in col_lower:
-                        mapeamento_colunas[col] = 'numero_processo'
-                    elif 'marca' in col_lower:
-                        mapeamento_colunas[col] = 'marca'
-                    elif 'classe' in col_lower or 'nice' in col_lower:
-                        mapeamento_colunas[col] = 'classe'
-                    elif 'titular' in col_lower or 'requerente' in col_lower or 'proprietario' in col_lower:
-                        mapeamento_colunas[col] = 'titular'
-                    elif 'data' in col_lower or 'concessao' in col_lower:
-                        mapeamento_colunas[col] = 'data_concessao'
-                
+                # Padronizar nomes de colunas (mapa em cache pela tupla de nomes de colunas)
+                mapeamento_colunas = _mapa_padronizacao_colunas(tuple(df.columns))
                 df = df.rename(columns=mapeamento_colunas)
             
-            # Normalizar classes (para garantir formato consistente)
-            coluna_classe = processador._encontrar_coluna(df, ['classe', 'classe_nice', 'class'])
+            # Normalizar classes (para garantir formato consistente; as classes são salvas normalizadas)
+            coluna_classe = processador._encontrar_coluna(df, processador.NOMES_COLUNA_CLASSE)
             if coluna_classe:
                 df = processador.normalizar_classes(df, coluna_classe)
             
@@ -936,11 +1042,12 @@ def processar_arquivo_upload(arquivo_upload, processador: ProcessadorINPI, db):
             tem_filtro_classes = classes_desejadas and len(classes_desejadas) > 0
             tem_filtro_palavras = palavras_chave and len(palavras_chave) > 0
             
+            # Sem filtros, nenhuma coluna extra é procurada e o DataFrame segue sem passar pelo filtro
             if tem_filtro_classes or tem_filtro_palavras:
                 # Encontrar coluna de especificação se necessário
                 coluna_espec = None
                 if tem_filtro_palavras:
-                    coluna_espec = processador._encontrar_coluna(df, ['especificacao', 'especificação', 'specification'])
+                    coluna_espec = processador._encontrar_coluna(df, processador.NOMES_COLUNA_ESPECIFICACAO)
                 
                 # Aplicar filtros usando método unificado
                 df = processador.filtrar_processos(
@@ -960,144 +1067,253 @@ def processar_arquivo_upload(arquivo_upload, processador: ProcessadorINPI, db):
         return None
 
 
-def renderizar_visualizacao_dados(df, processador: ProcessadorINPI):
-    """Renderiza a visualização dos dados processados"""
-    st.subheader("📊 Visualização dos Dados")
-    
-    # Identificar coluna de classe automaticamente
-    coluna_classe = processador._encontrar_coluna(df, ['classe', 'classe_nice', 'class'])
-    
-    # Se não encontrou com padrões específicos, buscar mais amplamente
-    if not coluna_classe:
-        for col in df.columns:
-            if 'classe' in col.lower() or 'nice' in col.lower():
-                coluna_classe = col
-                break
+def _mascara_valor_coluna(serie: pd.Series, valor: str) -> np.ndarray:
+    """Máscara das linhas cujo valor (como texto) é igual a valor; colunas category comparam só os códigos"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos = np.flatnonzero(serie.cat.categories.astype(str) == valor)
+        return np.isin(serie.cat.codes.to_numpy(), codigos)
+    if pd.api.types.is_integer_dtype(serie.dtype) and valor.isdigit():
+        return serie.eq(int(valor)).fillna(False).to_numpy(dtype=bool)
+    return (serie.astype(str) == valor).to_numpy()
+
+
+def _aplicar_filtros_selecao(df: pd.DataFrame, filtros: list) -> pd.DataFrame:
+    """
+    Aplica os filtros dos selectboxes ("Todas" = sem filtro) com uma única máscara combinada
     
-    if coluna_classe:
-        # Filtros
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            classes_unicas = sorted([str(c) for c in df[coluna_classe].unique() if pd.notna(c)])
-            classe_selecionada = st.selectbox(
-                "Filtrar por Classe:",
-                options=["Todas"] + classes_unicas
-            )
+    Args:
+        df: DataFrame a filtrar
+        filtros: Lista de (coluna ou None, valor selecionado)
         
-        with col2:
-            # Filtrar por marca se existir coluna de marca
-            coluna_marca = processador._encontrar_coluna(df, ['marca', 'nome_marca', 'marca_nome'])
-            
-            # Se não encontrou, buscar mais amplamente
-            if not coluna_marca:
-                for col in df.columns:
-                    if 'marca' in col.lower():
-                        coluna_marca = col
-                        break
-            
-            if coluna_marca:
-                marcas_unicas = sorted([str(m) for m in df[coluna_marca].unique() if pd.notna(m)])
-                marca_selecionada = st.selectbox(
-                    "Filtrar por Marca:",
-                    options=["Todas"] + marcas_unicas
-                )
-            else:
-                marca_selecionada = "Todas"
-        
-        with col3:
-            st.metric("Total de Processos", len(df))
-        
-        # Aplicar filtros
-        df_filtrado = df.copy()
-        
-        if classe_selecionada != "Todas":
-            df_filtrado = df_filtrado[df_filtrado[coluna_classe].astype(str) == classe_selecionada]
-        
-        if marca_selecionada != "Todas" and coluna_marca:
-            df_filtrado = df_filtrado[df_filtrado[coluna_marca].astype(str) == marca_selecionada]
-        
-        st.markdown("---")
-        
-        # Estatísticas por classe
-        st.subheader("📈 Estatísticas por Classe")
+    Returns:
+        DataFrame filtrado, ou o próprio df (sem cópia) se nenhum filtro estiver ativo
+    """
+    mascaras = [_mascara_valor_coluna(df[coluna], valor) for coluna, valor in filtros if coluna and valor != "Todas"]
+    if not mascaras:
+        return df
+    return df.loc[np.logical_and.reduce(mascaras)]
+
+
+# Opções de linhas por página nas tabelas paginadas (a primeira é também o mínimo para paginar)
+_OPCOES_POR_PAGINA = (50, 200, 1000)
+
+
+def _paginar(df: pd.DataFrame, chave: str) -> tuple:
+    """
+    Mostra os controles de paginação e devolve só as linhas da página atual
+    
+    Args:
+        df: DataFrame completo
+        chave: Prefixo das keys dos controles
         
-        if not df_filtrado.empty:
-            contagem_classes = df_filtrado[coluna_classe].value_counts().sort_index()
-            
-            # Métricas resumidas
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("Total de Classes", len(contagem_classes))
-            with col2:
-                st.metric("Total de Registros", len(df_filtrado))
-            with col3:
-                # Contar processos únicos
-                if 'numero_processo' in df_filtrado.columns:
-                    processos_unicos = df_filtrado['numero_processo'].nunique()
-                    st.metric("Processos Únicos", processos_unicos)
-                else:
-                    st.metric("Processos Únicos", "-")
-            with col4:
-                # Classe mais frequente
-                classe_mais_freq = contagem_classes.index[0] if len(contagem_classes) > 0 else "-"
-                st.metric("Classe Mais Frequente", classe_mais_freq)
-            
-            st.markdown("---")
-            
-            # Tabela detalhada por classe
-            st.markdown("---")
-            st.subheader("📋 Detalhamento por Classe")
-            
-            # Ordenar classes numericamente quando possível
-            classes_ordenadas = sorted(
-                df_filtrado[coluna_classe].unique(),
-                key=lambda x: (int(x) if str(x).isdigit() else 999, str(x))
-            )
-            
-            for classe in classes_ordenadas:
-                if pd.notna(classe):
-                    df_classe = df_filtrado[df_filtrado[coluna_classe] == classe].copy()
-                    
-                    # Determinar tipo de classe (Produto ou Serviço)
-                    tipo_classe = ""
-                    try:
-                        num_classe = int(str(classe).strip())
-                        if 1 <= num_classe <= 34:
-                            tipo_classe = " (Produto)"
-                        elif 35 <= num_classe <= 45:
-                            tipo_classe = " (Serviço)"
-                    except:
-                        pass
-                    
-                    # Selecionar colunas principais para exibição
-                    colunas_principais = ['numero_processo', 'marca', 'titular', 'data_concessao']
-                    colunas_disponiveis = [col for col in colunas_principais if col in df_classe.columns]
-                    
-                    with st.expander(f"Classe {classe}{tipo_classe} - {len(df_classe)} registro(s)"):
-                        st.dataframe(
-                            df_classe[colunas_disponiveis] if colunas_disponiveis else df_classe,
-                            use_container_width=True,
-                            hide_index=True
-                        )
-            
-            # Tabela geral
-            st.markdown("---")
-            st.subheader("📋 Dados Filtrados")
-            st.dataframe(
-                df_filtrado,
-                use_container_width=True,
-                hide_index=True
-            )
-            
-        else:
-            st.warning("Nenhum processo encontrado com os filtros selecionados.")
+    Returns:
+        Tupla (linhas da página, sufixo para a key da tabela; muda com a página para não
+        reaproveitar as edições de outra página)
+    """
+    if len(df) <= _OPCOES_POR_PAGINA[0]:
+        return df, ""
+    
+    col_por_pagina, col_pagina, col_linhas = st.columns([1, 1, 2])
+    with col_por_pagina:
+        por_pagina = st.selectbox("Por página", _OPCOES_POR_PAGINA, index=1, key=f"{chave}_por_pagina")
+    total_paginas = math.ceil(len(df) / por_pagina)
+    # Página guardada pode passar do total após mudar o tamanho da página ou os filtros
+    chave_pagina = f"{chave}_pagina"
+    if st.session_state.get(chave_pagina, 1) > total_paginas:
+        st.session_state[chave_pagina] = total_paginas
+    with col_pagina:
+        pagina = st.number_input("Página", min_value=1, max_value=total_paginas, step=1, key=chave_pagina)
+    inicio = (pagina - 1) * por_pagina
+    fim = min(inicio + por_pagina, len(df))
+    with col_linhas:
+        st.caption(f"Linhas {inicio + 1}–{fim} de {len(df)}")
+    return df.iloc[inicio:fim], f"_{pagina}_{por_pagina}"
+
+
+# Numeração das cargas de DataFrames usados como chave de cache (ver _impressao_dataframe)
+_CONTADOR_CARGAS = itertools.count()
+
+
+def _impressao_dataframe(df: pd.DataFrame) -> tuple:
+    """
+    Chave de cache de um DataFrame pela identidade, sem ler os valores (custo proporcional às colunas)
+    
+    O número de carga gravado em df.attrs evita que um DataFrame novo, que reaproveite o id() de um
+    já descartado, receba o resultado antigo do cache.
+    """
+    if '_carga_cache' not in df.attrs:
+        df.attrs['_carga_cache'] = next(_CONTADOR_CARGAS)
+    return (id(df), df.attrs['_carga_cache'], len(df), tuple(df.columns))
+
+
+@st.cache_data(show_spinner=False, max_entries=64, hash_funcs={pd.DataFrame: _impressao_dataframe})
+def _valores_unicos_ordenados(df: pd.DataFrame, coluna: str, reverso: bool = False) -> list:
+    """
+    Valores distintos (como texto, sem vazios) de uma coluna, ordenados para as opções dos filtros
+    
+    O cache identifica o DataFrame sem percorrer seus valores: nas reexecuções com o mesmo DataFrame
+    (o guardado no session state) a lista vem pronta.
+    """
+    valores = df[coluna]
+    if isinstance(valores.dtype, pd.CategoricalDtype):
+        # Categorias presentes, lidas dos códigos (sem unique sobre os valores)
+        codigos = valores.cat.codes.to_numpy()
+        presentes = np.bincount(codigos[codigos >= 0], minlength=len(valores.cat.categories)) > 0
+        return sorted({str(v) for v in valores.cat.categories[presentes]}, reverse=reverso)
+    if pd.api.types.is_numeric_dtype(valores.dtype):
+        # Números em ordem numérica ("2" antes de "10")
+        return [str(v) for v in sorted(valores.dropna().unique(), reverse=reverso)]
+    return sorted({str(v) for v in valores.dropna().unique()}, reverse=reverso)
+
+
+@st.cache_data(show_spinner=False)
+def _resolver_colunas_consulta(colunas: tuple) -> dict:
+    """
+    Colunas de classe, marca e revista usadas pelos filtros da consulta, calculadas uma vez por conjunto de colunas
+    
+    Returns:
+        Dicionário {'classe': ..., 'marca': ..., 'revista': ...} com o nome da coluna ou None
+    """
+    encontrar = ProcessadorINPI.encontrar_nome_coluna
+    return {
+        'classe': encontrar(colunas, ProcessadorINPI.NOMES_COLUNA_CLASSE + ('nice',)),
+        'marca': encontrar(colunas, ProcessadorINPI.NOMES_COLUNA_MARCA),
+        'revista': encontrar(colunas, ProcessadorINPI.NOMES_COLUNA_REVISTA),
+    }
+
+
+def _preparar_processos_consultar(df: pd.DataFrame) -> pd.DataFrame:
+    """Ajusta uma página de processos da consulta: verificacao como texto (vazia = NA) e classe como inteiro"""
+    # Verificação vazia ou só com espaços vira NA uma única vez aqui: "verificado" passa a ser só notna()
+    if 'verificacao' in df.columns:
+        verificacao = df['verificacao'].astype('string').str.strip()
+        df['verificacao'] = verificacao.mask(verificacao.eq(''))
+    else:
+        df['verificacao'] = pd.Series(pd.NA, index=df.index, dtype='string')
+    # Classe como inteiro (nulo permitido): ordenação numérica na tabela e nos filtros
+    if 'classe' in df.columns:
+        df['classe'] = pd.to_numeric(df['classe'], errors='coerce').astype('Int64')
+    return df
+
+
+def _concatenar_paginas_consultar(df_atual: pd.DataFrame, df_novo: pd.DataFrame) -> pd.DataFrame:
+    """Junta uma nova página aos processos já carregados, mantendo como category as colunas que já eram"""
+    df = pd.concat([df_atual, df_novo], ignore_index=True)
+    for col in df_atual.columns:
+        # Categorias diferentes entre as páginas fazem o concat devolver object
+        if isinstance(df_atual[col].dtype, pd.CategoricalDtype) and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+
+def _salvar_verificacoes_pendentes(db):
+    """Callback do botão "Salvar pendentes": grava as verificações pendentes em um único lote"""
+    verificacoes_pendentes = st.session_state.verificacoes_pendentes
+    resultado = db.atualizar_verificacoes_lote(dict(verificacoes_pendentes))
+    if resultado['sucesso']:
+        verificacoes_pendentes.clear()
+    st.session_state.resultado_salvar_verificacoes = resultado
+
+
+@_fragmento
+def _editor_nao_verificados(df_nao_verificados: pd.DataFrame, colunas_para_remover: list, column_config_classe: dict):
+    """
+    Tabela editável dos processos não verificados e o botão de marcação, como fragmento próprio:
+    marcar checkboxes ou trocar de página reexecuta só este bloco, sem refiltrar nem redesenhar a aba
     
+    Args:
+        df_nao_verificados: Processos filtrados ainda sem verificação
+        colunas_para_remover: Colunas ocultas na exibição
+        column_config_classe: Configuração de exibição da coluna de classe
+    """
+    if not df_nao_verificados.empty:
+        # Inicializar seleção de processos se não existir
+        st.session_state.setdefault('processos_selecionados', set())
+
+        # Remover também a coluna verificacao da exibição (não precisamos mais dela aqui);
+        # reset_index gera um novo DataFrame, que recebe a coluna de seleção abaixo
+        df_exibicao_nao_ver = df_nao_verificados.drop(
+            columns=colunas_para_remover + ['verificacao'], errors='ignore'
+        ).reset_index(drop=True)
+        df_nao_verificados_reset = df_nao_verificados.reset_index(drop=True)
+
+        # Paginar: o editor recebe só as linhas da página (o índice segue a posição em
+        # df_nao_verificados_reset, usada abaixo para achar os processos selecionados)
+        df_exibicao_nao_ver, sufixo_pagina = _paginar(df_exibicao_nao_ver, "paginacao_nao_verificados")
+
+        # Adicionar coluna de seleção (checkbox)
+        df_exibicao_nao_ver.insert(0, 'Selecionar', False)
+
+        # Configurar coluna de checkbox
+        column_config_nao_ver = {
+            'Selecionar': st.column_config.CheckboxColumn(
+                "Selecionar",
+                help="Marque os processos que deseja verificar",
+                width="small"
+            ),
+            **column_config_classe,
+        }
+
+        # Usar data_editor para permitir seleção
+        df_editado_nao_ver = st.data_editor(
+            df_exibicao_nao_ver,
+            use_container_width=True,
+            hide_index=True,
+            column_config=column_config_nao_ver,
+            num_rows="fixed",
+            key=f"tabela_processos_nao_verificados{sufixo_pagina}"
+        )
+
+        # Botão para marcar como verificado
+        processos_selecionados = df_editado_nao_ver[df_editado_nao_ver['Selecionar'] == True]
+        num_selecionados = len(processos_selecionados)
+
+        col_btn, col_info = st.columns([1, 2])
+
+        with col_btn:
+            if st.button("✅ Marcar como Verificado", 
+                        type="primary", 
+                        disabled=(num_selecionados == 0),
+                        key="btn_marcar_verificado",
+                        use_container_width=True):
+                # Obter números dos processos selecionados: o índice do df_editado corresponde ao
+                # índice do df_nao_verificados_reset (índices resetados), então basta um reindex
+                processos_para_verificar = []
+                if 'processo' in df_nao_verificados_reset.columns:
+                    processos_selecionados_num = (
+                        df_nao_verificados_reset['processo']
+                        .reindex(processos_selecionados.index)
+                        .dropna()
+                        .astype(str)
+                    )
+                    processos_para_verificar = processos_selecionados_num[
+                        processos_selecionados_num.ne('')
+                    ].tolist()
+
+                if processos_para_verificar:
+                    # Marcar como verificado (usar valor padrão "verificado"); a gravação no banco
+                    # fica pendente até "Salvar pendentes", para várias marcações irem em um só lote
+                    verificacoes_novas = {proc: "verificado" for proc in processos_para_verificar}
+                    st.session_state.verificacoes_pendentes.update(verificacoes_novas)
+
+                    # Atualizar session state
+                    st.session_state.verificacoes_dict.update(verificacoes_novas)
+                    # Atualizar no DataFrame completo (uma passada pela coluna processo)
+                    df_sessao = st.session_state.df_processos_consultar
+                    novas_verificacoes = df_sessao['processo'].astype(str).map(verificacoes_novas)
+                    atualizar = novas_verificacoes.notna()
+                    df_sessao.loc[atualizar, 'verificacao'] = novas_verificacoes[atualizar]
+
+                    # Recarregar para atualizar a separação
+                    st.rerun()
+
+        with col_info:
+            st.info(f"📊 **{len(df_nao_verificados)}** processo(s) não verificado(s) | **{num_selecionados}** selecionado(s)")
     else:
-        st.warning("⚠️ Coluna de classe não encontrada no arquivo. Exibindo dados completos.")
-        st.dataframe(df, use_container_width=True, hide_index=True)
+        st.info("✅ Todos os processos já foram verificados!")
 
 
+@_fragmento
 def renderizar_aba_consultar_dados(processador: ProcessadorINPI, db, init_supabase):
     """Renderiza a aba de Consultar Dados"""
     st.header("🔍 Consultar Dados")
@@ -1111,31 +1327,50 @@ def renderizar_aba_consultar_dados(processador: ProcessadorINPI, db, init_supaba
             st.rerun()
     else:
         # Inicializar df_processos_consultar se não existir (não carregar nada automaticamente)
-        if 'df_processos_consultar' not in st.session_state:
-            st.session_state.df_processos_consultar = None
+        st.session_state.setdefault('df_processos_consultar', None)
         
         # Seção: Seleção de classes (OBRIGATÓRIA antes de carregar)
         st.subheader("🎯 Selecione as Classes")
-        opcoes_classes = [str(i) for i in range(1, 46)]
-        
         classes_selecionadas_consultar = st.multiselect(
             "Classes Nice (1-45):",
-            options=opcoes_classes,
+            options=_OPCOES_CLASSES,
             default=st.session_state.get('classes_consultar_selecionadas', []),
             help="Selecione uma ou mais classes para carregar apenas esses processos do banco",
             key="multiselect_classes_consultar"
         )
         st.session_state.classes_consultar_selecionadas = classes_selecionadas_consultar
         
+        # Revista opcional: filtrada no Supabase, só as linhas dessa revista são transferidas
+        revistas_registradas = sorted(
+            listar_revistas_registradas_cache(db),
+            key=lambda n: int(n) if n.isdigit() else -1,
+            reverse=True
+        )
+        revista_consultar = st.selectbox(
+            "Revista (opcional):",
+            options=["Todas"] + revistas_registradas,
+            help="Carrega apenas os processos desta revista (filtro aplicado no banco)",
+            key="select_revista_consultar"
+        )
+        
         col_btn_carregar, col_btn_limpar = st.columns([1, 1])
         with col_btn_carregar:
             carregar_clicado = st.button("📥 Carregar Dados", type="primary", key="btn_carregar_consultar", use_container_width=True)
         with col_btn_limpar:
             limpar_clicado = st.button("🔄 Limpar e Recarregar", key="btn_limpar_consultar", use_container_width=True)
         
-        if limpar_clicado:
+        if limpar_clicado and st.session_state.get('verificacoes_pendentes'):
+            # Os dados recarregados não teriam as marcações ainda não gravadas no banco
+            st.warning(
+                f"⚠️ Há {len(st.session_state.verificacoes_pendentes)} verificação(ões) não salva(s). "
+                "Clique em **Salvar pendentes** antes de limpar."
+            )
+        elif limpar_clicado:
+            buscar_processos_pagina_cache.clear()
             st.session_state.df_processos_consultar = None
+            st.session_state.cursor_consultar = None
             st.session_state.verificacoes_dict = {}
+            st.session_state.verificacoes_pendentes = {}
             st.rerun()
         
         if carregar_clicado:
@@ -1144,11 +1379,20 @@ def renderizar_aba_consultar_dados(processador: ProcessadorINPI, db, init_supaba
             else:
                 try:
                     with st.spinner(f"Carregando processos das classes {', '.join(classes_selecionadas_consultar)}..."):
-                        df_todos = db.buscar_processos(classes=classes_selecionadas_consultar)
+                        # Primeira página (keyset; "Carregar mais" continua do cursor com os mesmos filtros).
+                        # Leitura cacheada (ttl de 5 min, limpa por escritas e por "Limpar e Recarregar");
+                        # o cache já devolve uma cópia própria do DataFrame a cada chamada
+                        filtros_carga = {
+                            'classes': classes_selecionadas_consultar,
+                            'numero_revista': revista_consultar if revista_consultar != "Todas" else None,
+                        }
+                        df_todos, st.session_state.cursor_consultar = buscar_processos_pagina_cache(
+                            db, colunas=_COLUNAS_CONSULTAR, limite=TAMANHO_PAGINA_CONSULTAR, **filtros_carga
+                        )
+                        st.session_state.filtros_carga_consultar = filtros_carga
                         if not df_todos.empty:
-                            if 'verificacao' not in df_todos.columns:
-                                df_todos['verificacao'] = ''
-                            st.session_state.df_processos_consultar = df_todos.copy()
+                            df_todos = _preparar_processos_consultar(df_todos)
+                            st.session_state.df_processos_consultar = df_todos
                             st.success(f"✅ {len(df_todos):,} processo(s) carregado(s) das classes {', '.join(classes_selecionadas_consultar)}!")
                             st.rerun()
                         else:
@@ -1163,47 +1407,58 @@ def renderizar_aba_consultar_dados(processador: ProcessadorINPI, db, init_supaba
                     elif 'rls' in erro_msg.lower() or 'row-level security' in erro_msg.lower():
                         st.info("💡 Verifique as políticas RLS do Supabase na tabela dados_marcas.")
         
-        df = st.session_state.df_processos_consultar.copy() if st.session_state.df_processos_consultar is not None else pd.DataFrame()
+        # Sem cópia: as únicas alterações (coluna verificacao) devem mesmo persistir no session state;
+        # os filtros e a exibição trabalham sobre novos DataFrames
+        df = st.session_state.df_processos_consultar if st.session_state.df_processos_consultar is not None else pd.DataFrame()
         
         if not df.empty:
             # Garantir que a coluna verificacao existe
             if 'verificacao' not in df.columns:
-                df['verificacao'] = ''
+                df['verificacao'] = pd.Series(pd.NA, index=df.index, dtype='string')
+            
+            # Chave de cada linha nas verificações (número do processo)
+            if 'processo' in df.columns:
+                chaves_processo = df['processo'].astype(str)
+            else:
+                chaves_processo = pd.Series('row_' + df.index.astype(str), index=df.index)
             
             # Inicializar verificações no session state se necessário
+            # (pendentes: marcadas na tela e ainda não gravadas no banco)
+            st.session_state.setdefault('verificacoes_pendentes', {})
             if 'verificacoes_dict' not in st.session_state:
-                st.session_state.verificacoes_dict = {}
                 # Preencher com valores existentes
-                for idx, row in df.iterrows():
-                    processo = str(row.get('processo', f'row_{idx}'))
-                    if pd.notna(row.get('verificacao')) and row.get('verificacao') != '':
-                        st.session_state.verificacoes_dict[processo] = row['verificacao']
-            
-            # Identificar coluna de classe
-            coluna_classe = processador._encontrar_coluna(df, ['classe', 'classe_nice', 'class'])
-            if not coluna_classe:
-                for col in df.columns:
-                    if 'classe' in col.lower() or 'nice' in col.lower():
-                        coluna_classe = col
-                        break
-            
-            # Identificar coluna de marca
-            coluna_marca = processador._encontrar_coluna(df, ['marca', 'nome_marca', 'marca_nome'])
-            if not coluna_marca:
-                for col in df.columns:
-                    if 'marca' in col.lower():
-                        coluna_marca = col
-                        break
+                preenchidas = df['verificacao'].notna()
+                st.session_state.verificacoes_dict = dict(
+                    zip(chaves_processo[preenchidas], df.loc[preenchidas, 'verificacao'])
+                )
             
-            # Identificar coluna de revista
-            coluna_revista = processador._encontrar_coluna(df, ['n_revista', 'numero_revista', 'revista'])
-            if not coluna_revista:
-                for col in df.columns:
-                    if 'revista' in col.lower() or col.lower() == 'n_revista':
-                        coluna_revista = col
-                        break
+            # Identificar colunas de classe, marca e revista (resolvidas uma vez por conjunto de colunas)
+            colunas_consulta = _resolver_colunas_consulta(tuple(df.columns))
+            coluna_classe = colunas_consulta['classe']
+            coluna_marca = colunas_consulta['marca']
+            coluna_revista = colunas_consulta['revista']
             
             st.info(f"📊 **{len(df)}** processo(s) encontrado(s)")
+            
+            # Mais registros no banco para os filtros carregados: busca a próxima página a partir do cursor
+            if st.session_state.get('cursor_consultar'):
+                if st.button(f"⏬ Carregar mais {TAMANHO_PAGINA_CONSULTAR:,}", key="btn_carregar_mais_consultar"):
+                    try:
+                        with st.spinner("Carregando mais processos..."):
+                            df_mais, st.session_state.cursor_consultar = buscar_processos_pagina_cache(
+                                db,
+                                colunas=_COLUNAS_CONSULTAR,
+                                apos=st.session_state.cursor_consultar,
+                                limite=TAMANHO_PAGINA_CONSULTAR,
+                                **st.session_state.filtros_carga_consultar
+                            )
+                        if not df_mais.empty:
+                            st.session_state.df_processos_consultar = _concatenar_paginas_consultar(
+                                df, _preparar_processos_consultar(df_mais)
+                            )
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Erro ao carregar dados: {str(e)}")
             st.markdown("---")
             
             # Filtros
@@ -1212,7 +1467,7 @@ def renderizar_aba_consultar_dados(processador: ProcessadorINPI, db, init_supaba
             
             with col1:
                 if coluna_classe:
-                    classes_unicas = sorted([str(c) for c in df[coluna_classe].unique() if pd.notna(c)])
+                    classes_unicas = _valores_unicos_ordenados(df, coluna_classe)
                     classe_selecionada = st.selectbox(
                         "Filtrar por Classe:",
                         options=["Todas"] + classes_unicas,
@@ -1223,7 +1478,7 @@ def renderizar_aba_consultar_dados(processador: ProcessadorINPI, db, init_supaba
             
             with col2:
                 if coluna_marca:
-                    marcas_unicas = sorted([str(m) for m in df[coluna_marca].unique() if pd.notna(m)])
+                    marcas_unicas = _valores_unicos_ordenados(df, coluna_marca)
                     marca_selecionada = st.selectbox(
                         "Filtrar por Marca:",
                         options=["Todas"] + marcas_unicas,
@@ -1234,7 +1489,7 @@ def renderizar_aba_consultar_dados(processador: ProcessadorINPI, db, init_supaba
             
             with col3:
                 if coluna_revista:
-                    revistas_unicas = sorted([str(r) for r in df[coluna_revista].unique() if pd.notna(r)], reverse=True)
+                    revistas_unicas = _valores_unicos_ordenados(df, coluna_revista, reverso=True)
                     revista_selecionada = st.selectbox(
                         "Filtrar por Revista:",
                         options=["Todas"] + revistas_unicas,
@@ -1249,17 +1504,12 @@ def renderizar_aba_consultar_dados(processador: ProcessadorINPI, db, init_supaba
             
             st.markdown("---")
             
-            # Aplicar filtros
-            df_filtrado = df.copy()
-            
-            if classe_selecionada != "Todas" and coluna_classe:
-                df_filtrado = df_filtrado[df_filtrado[coluna_classe].astype(str) == classe_selecionada]
-            
-            if marca_selecionada != "Todas" and coluna_marca:
-                df_filtrado = df_filtrado[df_filtrado[coluna_marca].astype(str) == marca_selecionada]
-            
-            if revista_selecionada != "Todas" and coluna_revista:
-                df_filtrado = df_filtrado[df_filtrado[coluna_revista].astype(str) == revista_selecionada]
+            # Aplicar filtros (uma máscara combinada; sem filtros o DataFrame é usado como está)
+            df_filtrado = _aplicar_filtros_selecao(df, [
+                (coluna_classe, classe_selecionada),
+                (coluna_marca, marca_selecionada),
+                (coluna_revista, revista_selecionada),
+            ])
             
             if len(df_filtrado) < len(df):
                 st.info(f"📋 **{len(df_filtrado)}** processo(s) após aplicar filtros (de {len(df)} total)")
@@ -1267,128 +1517,61 @@ def renderizar_aba_consultar_dados(processador: ProcessadorINPI, db, init_supaba
             st.markdown("---")
             
             # Atualizar coluna verificacao com valores do session state
-            for idx, row in df_filtrado.iterrows():
-                processo = str(row.get('processo', f'row_{idx}'))
-                if processo in st.session_state.verificacoes_dict:
-                    df_filtrado.at[idx, 'verificacao'] = st.session_state.verificacoes_dict[processo]
-            
-            # Separar processos verificados e não verificados
-            # Processos SEM verificação (vazios ou None)
-            df_nao_verificados = df_filtrado[
-                (df_filtrado['verificacao'].isna()) | 
-                (df_filtrado['verificacao'] == '') | 
-                (df_filtrado['verificacao'].astype(str).str.strip() == '')
-            ].copy()
+            # (assign gera um novo DataFrame: df_filtrado pode ser o próprio df quando não há filtros)
+            if st.session_state.verificacoes_dict:
+                df_filtrado = df_filtrado.assign(verificacao=(
+                    chaves_processo.loc[df_filtrado.index]
+                    .map(st.session_state.verificacoes_dict)
+                    .fillna(df_filtrado['verificacao'])
+                ))
             
-            # Processos COM verificação (preenchidos)
-            df_verificados = df_filtrado[
-                (df_filtrado['verificacao'].notna()) & 
-                (df_filtrado['verificacao'] != '') & 
-                (df_filtrado['verificacao'].astype(str).str.strip() != '')
-            ].copy()
+            # Separar processos verificados e não verificados com uma única máscara
+            # (verificados: verificação preenchida; não verificados: vazia ou None)
+            mascara_verificados = df_filtrado['verificacao'].notna().to_numpy()
+            df_verificados = df_filtrado.loc[mascara_verificados].copy()
+            df_nao_verificados = df_filtrado.loc[~mascara_verificados].copy()
             
             # Remover colunas id, created_at e status se existirem
             colunas_para_remover = ['id', 'created_at', 'status']
             
+            # Classe exibida como número (ordenação numérica no próprio grid)
+            column_config_classe = (
+                {coluna_classe: st.column_config.NumberColumn("Classe", format="%d")} if coluna_classe else {}
+            )
+            
+            # Resultado do último "Salvar pendentes" (a gravação roda no callback, antes desta execução)
+            resultado = st.session_state.pop('resultado_salvar_verificacoes', None)
+            if resultado is not None:
+                if resultado['sucesso']:
+                    st.success(f"✅ {resultado['sucessos']} processo(s) marcado(s) como verificado(s)!")
+                    if resultado.get('erros'):
+                        st.warning(f"⚠️ {len(resultado['erros'])} erro(s) ao salvar algumas verificações.")
+                else:
+                    st.error(f"❌ Erro ao salvar verificações: {resultado.get('erro', 'Erro desconhecido')}")
+            
+            # Verificações marcadas e ainda não gravadas: enviadas juntas em um único lote
+            verificacoes_pendentes = st.session_state.verificacoes_pendentes
+            if verificacoes_pendentes:
+                col_salvar, col_pendentes = st.columns([1, 2])
+                with col_salvar:
+                    st.button(
+                        f"💾 Salvar {len(verificacoes_pendentes)} pendente(s)",
+                        type="primary",
+                        key="btn_salvar_verificacoes_pendentes",
+                        on_click=_salvar_verificacoes_pendentes,
+                        args=(db,),
+                        use_container_width=True
+                    )
+                with col_pendentes:
+                    st.warning(f"⚠️ **{len(verificacoes_pendentes)}** verificação(ões) ainda não salva(s) no banco")
+                
+                st.markdown("---")
+            
             # ========== TABELA 1: PROCESSOS NÃO VERIFICADOS ==========
             st.subheader("📋 Processos Filtrados (Não Verificados)")
             st.markdown("Selecione os processos que deseja marcar como verificados")
             
-            if not df_nao_verificados.empty:
-                # Inicializar seleção de processos se não existir
-                if 'processos_selecionados' not in st.session_state:
-                    st.session_state.processos_selecionados = set()
-                
-                colunas_para_exibir_nao_ver = df_nao_verificados.columns.tolist()
-                for col in colunas_para_remover:
-                    if col in colunas_para_exibir_nao_ver:
-                        colunas_para_exibir_nao_ver.remove(col)
-                
-                # Remover coluna verificacao da exibição (não precisamos mais dela aqui)
-                if 'verificacao' in colunas_para_exibir_nao_ver:
-                    colunas_para_exibir_nao_ver.remove('verificacao')
-                
-                df_exibicao_nao_ver = df_nao_verificados[colunas_para_exibir_nao_ver].copy()
-                
-                # Resetar índice para garantir mapeamento correto
-                df_exibicao_nao_ver = df_exibicao_nao_ver.reset_index(drop=True)
-                df_nao_verificados_reset = df_nao_verificados.reset_index(drop=True)
-                
-                # Adicionar coluna de seleção (checkbox)
-                df_exibicao_nao_ver.insert(0, 'Selecionar', False)
-                
-                # Configurar coluna de checkbox
-                column_config_nao_ver = {
-                    'Selecionar': st.column_config.CheckboxColumn(
-                        "Selecionar",
-                        help="Marque os processos que deseja verificar",
-                        width="small"
-                    )
-                }
-                
-                # Usar data_editor para permitir seleção
-                df_editado_nao_ver = st.data_editor(
-                    df_exibicao_nao_ver,
-                    use_container_width=True,
-                    hide_index=True,
-                    column_config=column_config_nao_ver,
-                    num_rows="fixed",
-                    key="tabela_processos_nao_verificados"
-                )
-                
-                # Botão para marcar como verificado
-                processos_selecionados = df_editado_nao_ver[df_editado_nao_ver['Selecionar'] == True]
-                num_selecionados = len(processos_selecionados)
-                
-                col_btn, col_info = st.columns([1, 2])
-                
-                with col_btn:
-                    if st.button("✅ Marcar como Verificado", 
-                                type="primary", 
-                                disabled=(num_selecionados == 0),
-                                key="btn_marcar_verificado",
-                                use_container_width=True):
-                        # Obter números dos processos selecionados
-                        processos_para_verificar = []
-                        # O df_editado tem a mesma ordem que df_nao_verificados_reset (índices resetados)
-                        indices_selecionados = processos_selecionados.index.tolist()
-                        
-                        for idx_editado in indices_selecionados:
-                            # O índice do df_editado corresponde ao índice do df_nao_verificados_reset
-                            if idx_editado < len(df_nao_verificados_reset):
-                                processo_num = df_nao_verificados_reset.iloc[idx_editado].get('processo', None)
-                                if processo_num:
-                                    processos_para_verificar.append(str(processo_num))
-                        
-                        if processos_para_verificar:
-                            # Marcar como verificado (usar valor padrão "verificado")
-                            verificacoes_para_salvar = {proc: "verificado" for proc in processos_para_verificar}
-                            
-                            with st.spinner(f"Marcando {len(verificacoes_para_salvar)} processo(s) como verificado(s)..."):
-                                resultado = db.atualizar_verificacoes_lote(verificacoes_para_salvar)
-                                if resultado['sucesso']:
-                                    # Atualizar session state
-                                    for proc in processos_para_verificar:
-                                        st.session_state.verificacoes_dict[proc] = "verificado"
-                                        # Atualizar no DataFrame completo
-                                        mask = df['processo'] == proc
-                                        if mask.any():
-                                            df.loc[mask, 'verificacao'] = "verificado"
-                                            st.session_state.df_processos_consultar.loc[mask, 'verificacao'] = "verificado"
-                                    
-                                    st.success(f"✅ {resultado['sucessos']} processo(s) marcado(s) como verificado(s)!")
-                                    if resultado.get('erros'):
-                                        st.warning(f"⚠️ {len(resultado['erros'])} erro(s) ao salvar algumas verificações.")
-                                    # Recarregar dados para atualizar a separação
-                                    st.rerun()
-                                else:
-                                    st.error(f"❌ Erro ao salvar verificações: {resultado.get('erro', 'Erro desconhecido')}")
-                
-                with col_info:
-                    st.info(f"📊 **{len(df_nao_verificados)}** processo(s) não verificado(s) | **{num_selecionados}** selecionado(s)")
-            else:
-                st.info("✅ Todos os processos já foram verificados!")
-                df_editado_nao_ver = pd.DataFrame()
+            _editor_nao_verificados(df_nao_verificados, colunas_para_remover, column_config_classe)
             
             st.markdown("---")
             
@@ -1397,22 +1580,15 @@ def renderizar_aba_consultar_dados(processador: ProcessadorINPI, db, init_supaba
             st.markdown("Processos que já receberam verificação")
             
             if not df_verificados.empty:
-                colunas_para_exibir_ver = df_verificados.columns.tolist()
-                for col in colunas_para_remover:
-                    if col in colunas_para_exibir_ver:
-                        colunas_para_exibir_ver.remove(col)
-                
-                # Remover coluna verificacao da exibição (apenas para visualização)
-                if 'verificacao' in colunas_para_exibir_ver:
-                    colunas_para_exibir_ver.remove('verificacao')
-                
-                df_exibicao_ver = df_verificados[colunas_para_exibir_ver].copy()
+                # Remover também a coluna verificacao da exibição (apenas para visualização)
+                df_exibicao_ver = df_verificados.drop(columns=colunas_para_remover + ['verificacao'], errors='ignore')
                 
                 # Apenas exibir (sem edição)
                 st.dataframe(
                     df_exibicao_ver,
                     use_container_width=True,
-                    hide_index=True
+                    hide_index=True,
+                    column_config=column_config_classe
                 )
                 
                 st.info(f"📊 **{len(df_verificados)}** processo(s) verificado(s)")